@@ -0,0 +1,181 @@
+import random
+from pathlib import Path
+
+from openpyxl import Workbook
+
+from Extraction.Reader.PlateGeometry import PlateGeometry
+
+"""
+Writes synthetic Excel files that look like the exports of the Spark plate reader (see "Evaluation Folder/Example 2.xlsx").
+They are used by Run_Benchmark.py to measure how fast the script is with many and large files, without needing real measurements.
+"""
+
+BLANKS = [("Blank", "Blank"), ("BlankB", "BlankB"), ("BlankR", "BlankR")]
+
+
+class WorkbookGenerator:
+    """
+    Creates one Spark export per call of write().
+
+    wells: size of the plate, 96, 384 or 1536
+    occupancy: share of the wells that are used (the three blanks included)
+    method_mix: weights of the methods "f", "b" and "r", every sample is measured with one of them
+    replicates: number of wells per sample
+    dilutions: the dilution of a sample is picked from this list
+    fluorescence_scans: number of emission scans ("Wavel." tables with a "544" row)
+    absorbance_blocks: number of "<>" blocks (LS and Raw use the first two for blue and the next two for red)
+    ex_rows_at_top: whether the three "Ex" rows are written at the top of the sheet (like Example 1) instead of the end
+    kinetic_cycles: if set, a kinetic run is written instead: the blue and the red measurement with this many cycles each
+    cycle_seconds: time between two cycles of a kinetic run
+    """
+
+    def __init__(self, wells=96, occupancy=0.5, method_mix=None, replicates=4, dilutions=(1, 2, 10), fluorescence_scans=2, absorbance_blocks=4, ex_rows_at_top=False, kinetic_cycles=0, cycle_seconds=60, seed=0):
+        n_cols = {96: 12, 384: 24, 1536: 48}[wells]
+        self.geometry = PlateGeometry(PlateGeometry.FORMATS[n_cols], n_cols)
+        self.rows = [PlateGeometry.row_label(i) for i in range(self.geometry.n_rows)]
+        self.columns = range(1, n_cols + 1)
+        self.occupancy = occupancy
+        self.method_mix = method_mix or {"f": 1, "b": 1, "r": 1}
+        self.replicates = replicates
+        self.dilutions = list(dilutions)
+        self.fluorescence_scans = fluorescence_scans
+        self.absorbance_blocks = absorbance_blocks
+        self.ex_rows_at_top = ex_rows_at_top
+        self.kinetic_cycles = kinetic_cycles
+        self.cycle_seconds = cycle_seconds
+        self.random = random.Random(seed)
+
+    def write(self, file_path, plate_number=1):
+        """
+        Writes one workbook and gives back the number of samples in it.
+        """
+        wells = self._plate_layout(plate_number)
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Result sheet")
+
+        rows = []
+        ex_rows = self._ex_rows(wells)
+        if self.ex_rows_at_top:
+            rows += ex_rows + [[]]
+        rows += self._header(wells)
+        for scan in range(self.fluorescence_scans):
+            rows += self._fluorescence_scan(wells, scan)
+        if self.kinetic_cycles:
+            rows += self._kinetic_run(wells, "blue") + self._kinetic_run(wells, "red")
+        else:
+            for block in range(self.absorbance_blocks):
+                rows += self._absorbance_block(wells, block)
+        if not self.ex_rows_at_top:
+            rows += [[], []] + ex_rows
+
+        for row in rows:
+            sheet.append(row)
+        Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+        workbook.save(file_path)
+        return len({name for name, _, _, _ in wells if not name.startswith("Blank")})
+
+    # Fills the plate row by row: first the blanks, then the replicates of every sample
+    def _plate_layout(self, plate_number):
+        n_wells = max(len(BLANKS), min(self.geometry.n_wells, round(self.occupancy * self.geometry.n_wells)))
+        positions = [(row, col) for row in self.rows for col in self.columns][:n_wells]
+        methods = list(self.method_mix)
+        weights = [self.method_mix[m] for m in methods]
+
+        entries = [(name, method, 1) for name, method in BLANKS]
+        sample = 0
+        while len(entries) < n_wells:
+            sample += 1
+            method = self.random.choices(methods, weights)[0]
+            dilution = self.random.choice(self.dilutions)
+            for _ in range(min(self.replicates, n_wells - len(entries))):
+                entries.append((f"DOE {plate_number}.{sample}", method, dilution))
+
+        # Every sample has its own level, the replicates scatter a little around it
+        levels = {name: self.random.uniform(0.2, 1.0) for name, _, _ in entries}
+        return [
+            (name, method, dilution, (position, levels[name] * self.random.uniform(0.95, 1.05) if not name.startswith("Blank") else 0.0))
+            for (name, method, dilution), position in zip(entries, positions)
+        ]
+
+    def _ex_rows(self, wells):
+        return [
+            ["Ex"] + [name for name, _, _, _ in wells],
+            ["Ex"] + [method for _, method, _, _ in wells],
+            ["Ex"] + [dilution for _, _, dilution, _ in wells],
+        ]
+
+    def _header(self, wells):
+        return [
+            ["Application: SparkControl", None, None, None, "V3.2"],
+            ["Device: Spark", None, None, None, "Serial number: 0000000000"],
+            [],
+            ["Plate", None, None, None, "[GRE96fb_µClear] - Greiner 96 Flat Black"],
+            [],
+            ["Plate area", None, None, None, self._plate_area(wells)],
+            [],
+        ]
+
+    # Writes the used wells like the Spark does, e.g. "A1-A12;B1-B11"
+    @staticmethod
+    def _plate_area(wells):
+        by_row = {}
+        for _, _, _, ((row, col), _) in wells:
+            by_row.setdefault(row, []).append(col)
+        return ";".join(f"{row}{cols[0]}-{row}{cols[-1]}" if len(cols) > 1 else f"{row}{cols[0]}" for row, cols in by_row.items())
+
+    def _fluorescence_scan(self, wells, scan):
+        rows = [
+            ["Mode", None, None, None, "Fluorescence Top Reading"],
+            ["Name", None, None, None, f"Label {scan + 1}"],
+            [],
+            ["Wavel."] + [f"{row}{col}" for _, _, _, ((row, col), _) in wells],
+        ]
+        for wavelength in range(520, 642, 2):
+            peak = 1 - min(abs(wavelength - 544) / 120, 1)
+            rows.append([wavelength] + [round(300 + level * 30000 * peak * self.random.uniform(0.98, 1.02)) for _, _, _, (_, level) in wells])
+        rows += [["End Time", None, None, None, "2025-01-01 12:00:00"], []]
+        return rows
+
+    def _absorbance_block(self, wells, block):
+        values = {position: round(0.04 + level * 0.3 * self.random.uniform(0.98, 1.02), 4) for _, _, _, (position, level) in wells}
+        rows = [
+            ["Mode", None, None, None, "Absorbance"],
+            ["Name", None, None, None, f"{'blue' if block < 2 else 'red'} {block % 2 + 1}"],
+            [],
+            ["<>"] + list(self.columns),
+        ]
+        for row in self.rows:
+            rows.append([row] + [values.get((row, col)) for col in self.columns])
+        rows += [[], ["End Time", None, None, None, "2025-01-01 12:00:00"], []]
+        return rows
+
+    # Every cycle has its own block with cycle number and time, the values grow linearly with the level of the sample
+    def _kinetic_run(self, wells, label):
+        rows = [
+            ["Mode", None, None, None, "Absorbance"],
+            ["Name", None, None, None, label],
+            [],
+        ]
+        for cycle in range(self.kinetic_cycles):
+            seconds = cycle * self.cycle_seconds
+            values = {position: round(0.04 + level * 0.3 * (1 + seconds / 3600) * self.random.uniform(0.99, 1.01), 4) for _, _, _, (position, level) in wells}
+            rows += [["Cycle Nr.", cycle + 1], ["Time [s]", seconds], ["Temp. [°C]", 30], ["<>"] + list(self.columns)]
+            for row in self.rows:
+                rows.append([row] + [values.get((row, col)) for col in self.columns])
+            rows.append([])
+        rows += [["End Time", None, None, None, "2025-01-01 12:00:00"], []]
+        return rows
+
+
+def generate_folder(folder, n_files, **settings):
+    """
+    Writes n_files workbooks into the folder, every file with its own sample names.
+    """
+    folder = Path(folder)
+    generator = WorkbookGenerator(**settings)
+    paths = []
+    for number in range(1, n_files + 1):
+        path = folder / f"Synthetic {number:04d}.xlsx"
+        generator.write(path, plate_number=number)
+        paths.append(path)
+    return paths
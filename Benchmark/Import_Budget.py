@@ -0,0 +1,68 @@
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+current_dir = Path(__file__).resolve().parent
+main_folder = current_dir.parent
+
+"""
+-------------------Start-up time of main.py--------------------
+Checks that importing main.py and the quick commands ("--help", "--validate") stay fast:
+pandas, openpyxl and the extractors must only be imported once a file is evaluated.
+Every command is started in a new Python process (a cold start), the fastest of a few starts is compared with the budget.
+The script ends with exit code 1 if a budget is exceeded or a heavy module is imported, so it can be used as a check before a commit.
+
+Start it from the main folder with: python Benchmark/Import_Budget.py
+"""
+
+"""---Personalize the settings below---"""
+# Each command is started this many times, the fastest start is kept
+repeats = 5
+# Seconds allowed for each command, and the modules that must not be imported by "import main"
+budgets = {"import main": 0.15, "main.py --help": 0.15, "main.py --validate": 0.25}
+heavy_modules = ["pandas", "openpyxl", "Coordinator", "Extraction.AbsorptionCoordinator", "Extraction.ExtractFluorescence"]
+
+
+# This function starts a command in a new process and gives back its wall time in seconds
+def cold_start(arguments):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *arguments], cwd=main_folder, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    return time.perf_counter() - start
+
+
+# This function gives back the heavy modules that are loaded after "import main"
+def imported_heavy_modules():
+    code = f"import json, sys, main; print(json.dumps([m for m in {heavy_modules!r} if m in sys.modules]))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=main_folder, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def check_budget():
+    commands = {
+        "import main": ["-c", "import main"],
+        "main.py --help": ["main.py", "--help"],
+        "main.py --validate": ["main.py", "--validate"],
+    }
+    reference = min(cold_start(["-c", "import pandas, openpyxl"]) for _ in range(repeats))
+    print(f"ℹ️ Importing pandas and openpyxl alone takes {reference:.3f} s")
+
+    passed = True
+    for name, arguments in commands.items():
+        best = min(cold_start(arguments) for _ in range(repeats))
+        within = best <= budgets[name]
+        passed &= within
+        print(f"{'✅' if within else '❌'} {name:<20} {best:.3f} s (budget {budgets[name]:.2f} s)")
+
+    heavy = imported_heavy_modules()
+    if heavy:
+        passed = False
+        print(f"❌ 'import main' imports {', '.join(heavy)}, these have to be imported where they are used")
+    else:
+        print("✅ 'import main' does not import pandas, openpyxl or the extractors")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_budget() else 1)
@@ -0,0 +1,194 @@
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+current_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(current_dir.parent))  # The script is started from the Benchmark folder, the modules are in the folder above
+
+from Benchmark.Generator import generate_folder
+from Coordinator import Coordinator
+from Extraction.AbsorptionCoordinator import AbsorptionCoordinator
+from Extraction.ExtractFluorescence import FluorescenceProcessor
+from ReadAndWrite.Name_Reader import ReadNames
+from ReadAndWrite.ResultTable import ResultTable
+from ReadAndWrite.Sort import SortResult
+from ReadAndWrite.Write import WriteResult
+
+"""
+-------------------Benchmark of the evaluation--------------------
+Generates synthetic Spark exports (see Generator.py) and measures every step of the evaluation separately:
+reading the file, reading the names, the "<>" blocks, the absorption and fluorescence extraction, writing and sorting the output file.
+This is done for several folder sizes. The results are saved as a json file in Benchmark/Results,
+and compared with the last saved run, so it is visible if a change made the script slower.
+
+Start it from the main folder with: python Benchmark/Run_Benchmark.py
+"""
+
+"""---Personalize the settings below---"""
+# Number of input files per measured folder
+folder_sizes = [1, 10, 50]
+# Each folder size is measured this many times, the fastest time of each step is kept
+repeats = 3
+# Settings of the synthetic files (see WorkbookGenerator for all options)
+generator_settings = {"occupancy": 0.5, "method_mix": {"f": 1, "b": 1, "r": 1}, "replicates": 4, "dilutions": (1, 2, 10)}
+# Settings of the evaluation, like in main.py
+Version = "LS"
+return_individual = False
+streaming_reader = True
+# Name of this run in the results, by default the current git commit
+label = None
+
+results_folder = current_dir / "Results"
+
+
+class Benchmark:
+    """
+    Times the steps of the evaluation on a folder of synthetic files.
+    Every step is timed on its own, so the times of the steps do not include each other.
+    """
+
+    STAGES = ["read", "names", "blocks", "absorption", "fluorescence", "write", "sort"]
+
+    def __init__(self, folder, Version="LS", return_individual=False, streaming=True):
+        self.files = sorted(Path(folder).glob("*.xlsx"))
+        self.output_folder = Path(folder) / "Output"
+        self.Version = Version
+        self.return_individual = return_individual
+        self.streaming = streaming
+        self.times = {stage: 0.0 for stage in self.STAGES}
+
+    def run(self):
+        results = []
+        for file_path in self.files:
+            results.append(self._run_file(file_path))
+        self._run_output(ResultTable.concat(results))
+        return self.times
+
+    @contextlib.contextmanager
+    def _timed(self, stage):
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):  # The messages of the script are not part of the measurement
+                yield
+        finally:
+            self.times[stage] += time.perf_counter() - start
+
+    def _run_file(self, file_path):
+        coordinator = Coordinator(str(file_path), self.Version, return_individual=self.return_individual, streaming=self.streaming)
+        with self._timed("read"):
+            df = coordinator._read_file()
+
+        with self._timed("names"):
+            names = ReadNames(df, str(file_path))
+            names.read_setup()
+
+        # The blocks are read the same way the absorption extraction does: all blocks at once, then blank and dilution per color
+        markers = df.index[df.iloc[:, 0] == "<>"].tolist()
+        with self._timed("blocks"):
+            reader = AbsorptionCoordinator(df, names.methods, names.samples, names.positions, self.Version, names.dilutions, return_individual=self.return_individual)
+            reader._read_colors(markers)
+
+        result = ResultTable(source=file_path.name)
+        with self._timed("absorption"):
+            absorption = AbsorptionCoordinator(df, names.methods, names.samples, names.positions, self.Version, names.dilutions, return_individual=self.return_individual)
+            result.extend(absorption._Version_Coordination())
+
+        with self._timed("fluorescence"):
+            fluorescence = FluorescenceProcessor(df, names.methods, names.samples, names.dilutions, return_individual=self.return_individual)
+            result.extend(fluorescence._extract_setup())
+        return result
+
+    def _run_output(self, result):
+        self.output_folder.mkdir(parents=True, exist_ok=True)
+        output_file = self.output_folder / "Data collection.xlsx"
+        output_file.unlink(missing_ok=True)
+        with self._timed("write"):
+            WriteResult(output_file).write(result)
+        with self._timed("sort"):
+            SortResult(output_file).sort_file()
+
+
+def current_label():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=current_dir, capture_output=True, text=True, check=True)
+        return commit.stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run_benchmark():
+    run_label = label or current_label()
+    report = {
+        "label": run_label,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "settings": {"Version": Version, "return_individual": return_individual, "streaming_reader": streaming_reader, "repeats": repeats,
+                     "generator": {key: value if not isinstance(value, tuple) else list(value) for key, value in generator_settings.items()}},
+        "sizes": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_files in folder_sizes:
+            folder = Path(tmp) / f"{n_files} files"
+            print(f"📂 Generating {n_files} synthetic file(s)")
+            generate_folder(folder, n_files, **generator_settings)
+
+            best = {}
+            for _ in range(repeats):
+                times = Benchmark(folder, Version, return_individual, streaming_reader).run()
+                best = {stage: min(value, best.get(stage, value)) for stage, value in times.items()}
+            report["sizes"][str(n_files)] = {
+                stage: {"total_s": round(value, 6), "per_file_s": round(value / n_files, 6)} for stage, value in best.items()
+            }
+
+    previous = load_previous()
+    results_folder.mkdir(parents=True, exist_ok=True)
+    report_path = results_folder / f"benchmark {datetime.now():%Y-%m-%d %H-%M-%S} {run_label}.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print_summary(report, previous)
+    print(f"✅ Benchmark saved at {report_path}")
+
+
+# The last saved run, to compare the new times with
+def load_previous():
+    reports = sorted(results_folder.glob("benchmark *.json"))
+    if not reports:
+        return None
+    try:
+        with open(reports[-1], "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ Could not read the last benchmark {reports[-1]}: {e}")
+        return None
+
+
+def print_summary(report, previous):
+    compare = previous is not None
+    header = f"{'files':>6} {'stage':<13} {'total [s]':>10} {'per file [s]':>13}"
+    if compare:
+        header += f"  vs {previous['label']}"
+    print(header)
+    for n_files, stages in report["sizes"].items():
+        for stage, value in stages.items():
+            line = f"{n_files:>6} {stage:<13} {value['total_s']:>10.4f} {value['per_file_s']:>13.5f}"
+            old = previous["sizes"].get(n_files, {}).get(stage) if compare else None
+            if old and old["total_s"] > 0:
+                ratio = value["total_s"] / old["total_s"]
+                line += f"  {ratio:>5.2f}x" + (" ⚠️" if ratio > 1.2 else "")
+            print(line)
+
+
+if __name__ == "__main__":
+    run_benchmark()
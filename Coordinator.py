@@ -1,78 +1,130 @@
 import pandas as pd
-import sys
 import os
 
-from ReadAndWrite.Name_Reader import ReadNames
-from ReadAndWrite.Write import WriteResult
-from Extraction.ExtractFluorescence import FluorescenceProcessor
-from Extraction.AbsorptionCoordinator import AbsorptionCoordinator
+from Instrumentation import instrumentation, stage
+from Extraction.Errors import ExtractionError
+from Extraction.Reader.PlateLayout import PlateLayout
+from ReadAndWrite.ResultTable import ResultTable
+from ReadAndWrite.SheetCache import SheetCache
+from Extraction.Registry import MethodRegistry
 
 
 
 class Coordinator:
 
-    def __init__(self, file_path, Version, return_individual):
+    def __init__(self, file_path, Version, return_individual, cache_dir=None, streaming=False, wavelength_selection=None, statistics=("avg", "std"), kinetic_metrics=("rate", "auc")):
         self.Version = Version
         self.file_path = file_path
-        self.result = {}
+        self.result = None
         self.metadata = []
         self.return_individual = return_individual
+        self.cache_dir = cache_dir
+        self.streaming = streaming
+        self.wavelength_selection = wavelength_selection or {}
+        self.statistics = statistics
+        self.kinetic_metrics = kinetic_metrics
+        self.layout = None
+        self.registry = MethodRegistry.load()
 
 
     def get_result(self):
-        df = self._read_file() # 1: Read the file
-        sample_names, sample_methods, sample_positions, sample_dilutions = self._read_names(df) # 2: Read the names, methods, and positions from the file
-        write = WriteResult(self.file_path)
-        #self.result = write.final_result_dict(sample_names)  # 3: Create a result dict with the sample names as keys, here the values are all none and will be updated if evaluated
-        self.result = {}
-        self.coordinate_extraction(sample_names, sample_methods, sample_positions, sample_dilutions, df)
+        file_name = os.path.basename(self.file_path)
+        with instrumentation.profile(self.file_path), stage("file", file_name):
+            with stage("read", file_name):
+                df = self._read_file() # 1: Read the file
+            with stage("names", file_name):
+                sample_names, sample_methods, sample_positions, sample_dilutions = self._read_names(df) # 2: Index the file and read the names, methods, and positions from it
+            self.result = ResultTable(source=file_name)
+            self.coordinate_extraction(sample_names, sample_methods, sample_positions, sample_dilutions, df)
+        self.layout = None  # The index holds the whole sheet, it is released as soon as the results are collected
         return self.result
 
+    # Runs the extractors of the method codes found in the file, only their modules are imported (see Extraction/Methods.json)
     def coordinate_extraction(self, sample_names, sample_methods, sample_positions, sample_dilutions, df):
         
-        if "f" in sample_methods:
-            fprocessor = FluorescenceProcessor(df, sample_methods, sample_names, sample_dilutions, return_individual=self.return_individual)
-            values_fluorescence = fprocessor._extract_setup()
-            for sample, values in values_fluorescence.items():
-                if sample not in self.result:
-                    self.result[sample] = {}
-                self.result[sample].update(values)
-
-                    
-
-        if "b" in sample_methods or "r" in sample_methods:
-            Extract = AbsorptionCoordinator(df, sample_methods, sample_names, sample_positions, self.Version, sample_dilutions, return_individual=self.return_individual)
-            values_absorption = Extract._Version_Coordination()
-            for sample, values in values_absorption.items():
-                if sample not in self.result:
-                    self.result[sample] = {}
-                self.result[sample].update(values)
-
+        file_name = os.path.basename(self.file_path)
+        settings = {"Version": self.Version, "return_individual": self.return_individual,
+                    "wavelength_selection": self.wavelength_selection, "statistics": self.statistics,
+                    "kinetic_metrics": self.kinetic_metrics, "registry": self.registry}
+        for name, extractor in self.registry.extractors_for(sample_methods):
+            with stage(name, file_name):
+                values = extractor.extract(df, self.layout, settings)
+            self.result.extend(values)
 
 
 
     def _read_file(self):
-        # Open the file
+        # Use the parsed sheet from the cache if this exact file was read before
+        cache = None
+        if self.cache_dir is not None:
+            try:
+                cache = SheetCache(self.cache_dir)
+                key = cache.key(self.file_path, variant=self._read_variant())
+                df = cache.load(key)
+                if df is not None:
+                    return df
+            except Exception as e:
+                print(f"⚠️ Sheet cache not available, reading the Excel file directly: {e}")
+                cache = None
+
+        # Open the file, either completely or only the rows needed for the evaluation
         try:
-            df = pd.read_excel(self.file_path, header=None)
-        except:
-            print(f"❌ Failed to read the file: {self.file_path}. Please check if the file exists and is a valid Excel file.")
-            sys.exit()
+            if not self.streaming:
+                df = pd.read_excel(self.file_path, header=None)
+            elif self.Version == "Kinetic":
+                # A kinetic run needs all cycles and the rows with their names and times
+                from Extraction.Kinetic import KineticExtractor
+                from ReadAndWrite.Stream_Reader import StreamReader
+                df = StreamReader(self.file_path, blocks_needed=None, keep_labels=KineticExtractor.KEEP_LABELS).read()
+            else:
+                from ReadAndWrite.Stream_Reader import StreamReader
+                df = StreamReader(self.file_path, blocks_needed=self.registry.blocks_needed.get(self.Version), keep_scans=self._needs_scans(),
+                                  block_methods=self.registry.methods_reading("blocks")).read()
+        except Exception as e:
+            raise ExtractionError(f"Failed to read the file: {self.file_path}. Please check if the file exists and is a valid Excel file ({e}).") from e
+
+        if cache is not None:
+            cache.store(key, df)
         return df
 
-    # Read names from file with LS's Name_Reader
+    # The cache keeps the full sheet and the parts read by the StreamReader apart
+    def _read_variant(self):
+        if not self.streaming:
+            return "full"
+        if self.Version == "Kinetic":
+            return "stream-kinetic"
+        return "stream-spectral" if self._needs_scans() else "stream"
+
+    # Whether the whole scans are needed for the fluorescence, or only the "544" rows
+    def _needs_scans(self):
+        from Extraction.Spectral import reads_544_rows
+        return not reads_544_rows(self.wavelength_selection.get("f"))
+
+    # Index the file once and read the names from it with LS's Name_Reader, the extractors use the same index later
     def _read_names(self, df):
         try:
-            name_reader = ReadNames(df, self.file_path)
-            name_reader.read_setup()  
+            self.layout = PlateLayout(df, self.file_path).build()
+        except ExtractionError:
+            raise  # ReadNames already tells which part of the layout is wrong
         except Exception as e:
-            print(f"❌ Failed to read names from the file: {self.file_path}. Please check the file format: {e}")
-            sys.exit()
-        sample_names = name_reader.samples
-        sample_methods = name_reader.methods
-        sample_positions = name_reader.positions
-        sample_dilutions = name_reader.dilutions
+            raise ExtractionError(f"Failed to read names from the file: {self.file_path}. Please check the file format: {e}") from e
+        sample_names = self.layout.samples
+        sample_methods = self.layout.methods
+        sample_positions = self.layout.positions
+        sample_dilutions = self.layout.dilutions
         return sample_names, sample_methods, sample_positions, sample_dilutions
 
 
-    
\ No newline at end of file
+# This function runs the Coordinator for one file in a separate process (see "workers" in main.py)
+# A sys.exit() inside the extraction is turned into an ExtractionError, so the main script can tell which file failed
+# Gives back the results and the measurements of the instrumentation, which are added to the run report of the main process
+def extract_file(file_path, Version, return_individual, cache_dir=None, streaming=False, instrument=None, wavelength_selection=None, statistics=("avg", "std"),
+                 kinetic_metrics=("rate", "auc")):
+    if instrument is not None:
+        instrumentation.configure(**instrument)
+    try:
+        processor = Coordinator(file_path, Version, return_individual=return_individual, cache_dir=cache_dir, streaming=streaming, wavelength_selection=wavelength_selection, statistics=statistics,
+                                kinetic_metrics=kinetic_metrics)
+        return processor.get_result(), instrumentation.take_records()
+    except SystemExit:
+        raise ExtractionError(f"Extraction stopped for {os.path.basename(file_path)}, see the messages above.")
@@ -1,52 +1,118 @@
-from Extraction.Reader.BlockReading import BlockReader
-from Extraction.Transformation.TransformationBlue import TransformationBlue
-from Extraction.Transformation.TransformationRed import TransformationRed
-from Extraction.Transformation.avg_std import compute_averages_and_deviations
-import sys
+from Extraction.Errors import ExtractionError
+from Extraction.Reader.BlockReading import BlockArray
+from Extraction.Registry import MethodRegistry
+from Extraction.Transformation.avg_std import summarize_groups
+from ReadAndWrite.ResultTable import ResultTable
+import numpy as np
 import traceback
 
 class AbsorptionCoordinator:
-    def __init__(self, dataframe, sample_methods, sample_names, sample_positions, Version, sample_dilutions, return_individual):
+    def __init__(self, dataframe, sample_methods, sample_names, sample_positions, Version, sample_dilutions, return_individual, layout=None, registry=None, statistics=("avg", "std"), kinetic_metrics=("rate", "auc")):
         self.Version = Version
         self.df = dataframe
         self.sample_dilutions = sample_dilutions
         self.sample_methods = sample_methods
         self.sample_names = sample_names
         self.sample_positions = sample_positions
-        self.all_sample_data = {}
         self.return_individual = return_individual
+        self.layout = layout
+        self.blocks = None
+        self.kinetic_series = {}
+        self.registry = registry or MethodRegistry.load()
+        self.statistics = statistics
+        self.kinetic_metrics = kinetic_metrics
 
+    # Entry point for the Coordinator, see Extraction/Registry.py
+    @classmethod
+    def extract(cls, dataframe, layout, settings):
+        coordinator = cls(dataframe, layout.methods, layout.samples, layout.positions, settings["Version"], layout.dilutions,
+                          return_individual=settings["return_individual"], layout=layout, registry=settings.get("registry"), statistics=settings["statistics"],
+                          kinetic_metrics=settings.get("kinetic_metrics", ("rate", "auc")))
+        return coordinator._Version_Coordination()
+
+    # The function for the Version is taken from the registry (the "versions" in Extraction/Methods.json)
     def _Version_Coordination(self):
         try:
-            if self.Version == "LS":
-                print("🔹 Starting absorption extraction with LS version...")
-                return self.LS()
-            elif self.Version == "Raw":
-                print("🔹 Starting absorption extraction with Raw version...")
-                return self.Raw()
-            else:
-                print(f"Unknown Version: {self.Version}. Please use 'LS' or 'Raw'. This can be set in the main.py file.")
-                sys.exit()
+            function_name = self.registry.version(self.Version)
+            if function_name is None:
+                known = "', '".join(self.registry.versions)
+                raise ExtractionError(f"Unknown Version: {self.Version}. Please use '{known}'. This can be set in the main.py file.")
+            print(f"🔹 Starting absorption extraction with {self.Version} version...")
+            return getattr(self, function_name)()
         except Exception as e:
-            print(f"❌ Error during absorption extraction with version '{self.Version}': {e}")
             traceback.print_exc()
-            sys.exit()
+            raise ExtractionError(f"Error during absorption extraction with version '{self.Version}': {e}") from e
+
+
+    # The rows of the "<>" markers, taken from the index of the file if available
+    def _find_markers(self):
+        if self.layout is not None:
+            return self.layout.marker_rows
+        return self.df[self.df.iloc[:, 0] == "<>"].index.tolist()
+
+    # Reads the blocks of one color for all samples at once
+    # Blank subtraction, dilution and grouping by sample are done on arrays instead of well by well
+    # Gives back a dict with the corrected values of each sample, block after block
+    def _read_blocks(self, marker_indices, block_numbers, blank, method, color):
+        block_numbers = list(block_numbers)
+        methods = [str(m).lower() for m in self.sample_methods]
+        blank_cols = [i for i, m in enumerate(methods) if m == blank.lower()]
+        sample_cols = [i for i, m in enumerate(methods) if m == method.lower()]
+
+        if max(blank_cols + sample_cols, default=-1) >= len(self.sample_positions):
+            for n, i in enumerate(block_numbers, start=1):
+                print(f"❌ Error in {color} block {n} at marker index {marker_indices[i]}: not every sample has a position in the plate area.")
+            return {}
+
+        well_index = self.blocks.well_index(self.sample_positions)
+        values = self.blocks.well_values(well_index, block_numbers)  # shape (n_blocks, n_samples)
+
+        # Blank: the first blank well with a value, separately for every block
+        blank_values = values[:, blank_cols]
+        has_blank = ~np.isnan(blank_values)
+        found = has_blank.any(axis=1)
+        blank_per_block = np.full(len(values), np.nan)
+        if blank_cols:
+            blank_per_block = blank_values[np.arange(len(values)), has_blank.argmax(axis=1)]
+        for n, i in enumerate(block_numbers, start=1):
+            if not found[n - 1]:
+                print(f"❌ Error in {color} block {n} at marker index {marker_indices[i]}: No valid blank '{blank.lower()}' found in block at index {marker_indices[i]}")
+
+        corrected = values[found][:, sample_cols] - blank_per_block[found][:, None]
+        present = ~np.isnan(corrected)
+        for b, k in np.argwhere(~present):
+            row, col = self.sample_positions[sample_cols[k]]
+            print(f"⚠️ Missing value for sample '{self.sample_names[sample_cols[k]]}' at ({row}, {col})")
 
+        # Group the columns by sample name and apply the dilutions of each sample to all blocks at once
+        columns_by_name = {}
+        for k, i in enumerate(sample_cols):
+            columns_by_name.setdefault(self.sample_names[i], []).append(k)
 
-    # Apply dilution to replicate values
-    def apply_dilution_replicates(self, name, values, dilution_map):
-        dilutions = dilution_map.get(name, [1.0] * len(values))
-        if len(dilutions) != len(values):
-            print(f"⚠️ Mismatch for '{name}': {len(values)} values, {len(dilutions)} dilutions. Skipping dilution.")
-            return values
+        dilution_map = self.get_dilution_map(method)
+        sample_data = {}
+        for name, cols in columns_by_name.items():
+            name_values = corrected[:, cols]
+            name_present = present[:, cols]
+            if name in dilution_map:
+                dilutions = np.asarray(dilution_map[name], dtype=float)
+                counts = name_present.sum(axis=1)
+                apply = counts == len(dilutions)
+                for count in counts[(counts > 0) & ~apply]:
+                    print(f"⚠️ Mismatch for '{name}': {count} values, {len(dilutions)} dilutions. Skipping dilution.")
+                # The n-th value found in a block gets the n-th dilution of the sample
+                rank = np.clip(np.cumsum(name_present, axis=1) - 1, 0, len(dilutions) - 1)
+                factors = np.where(apply[:, None] & name_present, dilutions[rank], 1.0)
+                name_values = name_values * factors
 
-        return [v * d for v, d in zip(values, dilutions)]
+            if name_present.any():
+                sample_data[name] = name_values[name_present].tolist()
+        return sample_data
 
-    
     def get_dilution_map(self, method):
         """
         Creates a dict mapping sample names to a list of dilution factors
-        filtered by method ('b' or 'r'), preserving order.
+        filtered by method (e.g. 'b' or 'r'), preserving order.
         """
         dilution_map = {}
         for name, m, d in zip(self.sample_names, self.sample_methods, self.sample_dilutions):
@@ -56,189 +122,139 @@ class AbsorptionCoordinator:
 
 
 
-    # This function is used to extract the data from the file with the LS's method
-    def LS(self):
+    # The "<>" markers of the file, the Version needs at least its "blocks_needed" of them (see Extraction/Methods.json)
+    def _block_markers(self):
+        needed = self.registry.blocks_needed.get(self.Version, 1)
         try:
-            marker_indices = self.df[self.df.iloc[:, 0] == "<>"].index.tolist()
-            if len(marker_indices) < 4:
-                raise ValueError(f"❌ Expected at least 4 '<>' markers, found {len(marker_indices)}.")
+            marker_indices = self._find_markers()
+            if len(marker_indices) < needed:
+                raise ValueError(f"Expected at least {needed} '<>' markers, found {len(marker_indices)}.")
         except Exception as e:
-            print(f"❌ Error finding '<>' markers: {e}")
-            sys.exit()
-
-        blankblue = "BlankB"
-        methodBlue = "b"
-        blankred = "BlankR"
-        methodRed = "r"
-
-        excluded_names = {"Blank", "BlankB", "BlankR"}
-        unique_names = sorted({name for name in self.sample_names if name not in excluded_names})
-        full_data = {name: {"blue_avg": None, "blue_std": None, "red_avg": None, "red_std": None} for name in unique_names}
-
-        # --- BLUE ---
-        blue_dilution_map = self.get_dilution_map("b")
-        blue_data = {}
-        for i in range(0, 2):
-            try:
-                reader = BlockReader(
-                    self.df, marker_indices[i],
-                    self.sample_methods,
-                    self.sample_names,
-                    self.sample_positions,
-                    blank=blankblue,
-                    method=methodBlue
-                )
-                block_data = reader.process_block()
-                for name, values in block_data.items():
-                    values = self.apply_dilution_replicates(name, values, blue_dilution_map)
-                    blue_data.setdefault(name, []).extend(values)
-            except Exception as e:
-                print(f"❌ Error in blue block {i+1} at marker index {marker_indices[i]}: {e}")
-
-        # ⬇️ Apply transformation to blue data
-        for name in unique_names:
-            if name in blue_data:
-                raw_values = blue_data[name]
-
-                if self.return_individual:
-                    for idx, val in enumerate(raw_values, start=1):
-                        new_name = f"{name}_{idx}"
-                        if new_name not in full_data:
-                            full_data[new_name] = {"blue_avg": None, "blue_std": None, "red_avg": None, "red_std": None}
-                        full_data[new_name]["blue_avg"] = val
-                        full_data[new_name]["blue_std"] = 0
-                else:
-                    transformerBlue = TransformationBlue(raw_values)
-                    avg, std = transformerBlue.transformation()
-                    full_data[name]["blue_avg"] = avg
-                    full_data[name]["blue_std"] = std
-
-
-        # --- RED ---
-        red_data = {}
-        red_dilution_map = self.get_dilution_map("r")
-        for i in range(2, 4):
-            try:
-                reader = BlockReader(
-                    self.df, marker_indices[i],
-                    self.sample_methods,
-                    self.sample_names,
-                    self.sample_positions,
-                    blank=blankred,
-                    method=methodRed
-                )
-                block_data = reader.process_block()
-                for name, values in block_data.items():
-                    values = self.apply_dilution_replicates(name, values, red_dilution_map)
-                    red_data.setdefault(name, []).extend(values)
-            except Exception as e:
-                print(f"❌ Error in red block {i-1} at marker index {marker_indices[i]}: {e}")
-
-        for name in unique_names:
-            if name in red_data:
-                raw_values = red_data[name]
-
-                if self.return_individual:
-                    for idx, val in enumerate(raw_values, start=1):
-                        new_name = f"{name}_{idx}"
-                        if new_name not in full_data:
-                            full_data[new_name] = {"blue_avg": None, "blue_std": None, "red_avg": None, "red_std": None}
-                        full_data[new_name]["red_avg"] = val
-                        full_data[new_name]["red_std"] = 0
-                else:
-                    transformerRed = TransformationRed(raw_values)
-                    avg, std = transformerRed.transformation()
-                    full_data[name]["red_avg"] = avg
-                    full_data[name]["red_std"] = std
+            raise ExtractionError(f"Error finding '<>' markers: {e}") from e
+        return marker_indices
 
-        return full_data
+    # The sample names without the blanks of all methods
+    def _unique_names(self):
+        excluded_names = self.registry.blanks()
+        return sorted({name for name in self.sample_names if name not in excluded_names})
+
+    # Reads the blocks of every method measured in the "<>" blocks, with its blank and its blocks from the registry
+    # ("b": blue from the first two blocks with "BlankB", "r": red from the next two with "BlankR")
+    # Gives back a dict color -> values of each sample
+    def _read_colors(self, marker_indices):
+        # All blocks of the file are loaded at once
+        self.blocks = BlockArray(self.df, marker_indices, geometry=self.layout.geometry if self.layout is not None else None)
+        color_data = {}
+        for method in self.registry.methods_reading("blocks"):
+            color = self.registry.color(method)
+            color_data[color] = self._read_blocks(marker_indices, self.registry.blocks(method), self.registry.blank(method), method, color)
+        return color_data
+
+    # This function is used to extract the data from the file with the LS's method
+    def LS(self):
+        marker_indices = self._block_markers()
+        unique_names = self._unique_names()
+        color_data = self._read_colors(marker_indices)
+
+        # ⬇️ Convert the values of all colors into concentrations before averaging (see Transformation/Coefficients.csv)
+        convert = {self.registry.color(method): self.registry.transformation(method, self.Version) for method in self.registry.methods_reading("blocks")}
+        return self._collect_results(unique_names, color_data, convert)
 
     # This function is used to extract the data from the file with the Raw's method
     def Raw(self):
-            try:
-                marker_indices = self.df[self.df.iloc[:, 0] == "<>"].index.tolist()
-                if len(marker_indices) < 4:
-                    raise ValueError(f"❌ Expected at least 4 '<>' markers, found {len(marker_indices)}.")
-            except Exception as e:
-                print(f"❌ Error finding '<>' markers: {e}")
-                sys.exit()
-
-            blankblue = "BlankB"
-            methodBlue = "b"
-            blankred = "BlankR"
-            methodRed = "r"
-
-            excluded_names = {"Blank", "BlankB", "BlankR"}
-            unique_names = sorted({name for name in self.sample_names if name not in excluded_names})
-            full_data = {name: {"blue_values": None, "red_values": None} for name in unique_names}
-    
-            # --- BLUE ---
-            blue_dilution_map = self.get_dilution_map("b")
-            blue_data = {}
-            for i in range(0, 2):
-                try:
-                    reader = BlockReader(
-                        self.df, marker_indices[i],
-                        self.sample_methods,
-                        self.sample_names,
-                        self.sample_positions,
-                        blank=blankblue,
-                        method=methodBlue
-                    )
-                    block_data = reader.process_block()
-                    for name, values in block_data.items():
-                        values = self.apply_dilution_replicates(name, values, blue_dilution_map)
-                        blue_data.setdefault(name, []).extend(values)
-                except Exception as e:
-                    print(f"❌ Error in blue block {i+1} at marker index {marker_indices[i]}: {e}")
-
-            # ⬇️ Apply transformation to blue data
-            for name in unique_names:
-                if name in red_data:
-                    if self.return_individual:
-                        for idx, val in enumerate(blue_data[name], start=1):
-                            new_name = f"{name}_{idx}"
-                            if new_name not in full_data:
-                                full_data[new_name] = {"blue_avg": None, "blue_std": None, "red_avg": None, "red_std": None}
-                            full_data[new_name]["blue_avg"] = val
-                            full_data[new_name]["blue_std"] = 0
-                    else:
-                        avg, std = compute_averages_and_deviations(blue_data[name])
-                        full_data[name]["blue_avg"] = avg
-                        full_data[name]["blue_std"] = std
-
-            # --- RED ---
-            red_dilution_map = self.get_dilution_map("r")
-            red_data = {}
-            for i in range(2, 4):
-                try:
-                    reader = BlockReader(
-                        self.df, marker_indices[i],
-                        self.sample_methods,
-                        self.sample_names,
-                        self.sample_positions,
-                        blank=blankred,
-                        method=methodRed
-                    )
-                    block_data = reader.process_block()
-                    for name, values in block_data.items():
-                        values = self.apply_dilution_replicates(name, values, red_dilution_map)
-                        red_data.setdefault(name, []).extend(values)
-                except Exception as e:
-                    print(f"❌ Error in red block {i-1} at marker index {marker_indices[i]}: {e}")
-
-            for name in unique_names:
-                if name in red_data:
-                    if self.return_individual:
-                        for idx, val in enumerate(blue_data[name], start=1):
-                            new_name = f"{name}_{idx}"
-                            if new_name not in full_data:
-                                full_data[new_name] = {"red_avg": None, "red_std": None, "blue_avg": None, "blue_std": None}
-                            full_data[new_name]["red_avg"] = val
-                            full_data[new_name]["red_std"] = 0
-                    else:
-                        avg, std = compute_averages_and_deviations(blue_data[name])
-                        full_data[name]["red_avg"] = avg
-                        full_data[name]["red_std"] = std
-
-            return full_data
+        marker_indices = self._block_markers()
+        unique_names = self._unique_names()
+        color_data = self._read_colors(marker_indices)
+
+        # No transformation, only the average and standard deviation of the values
+        return self._collect_results(unique_names, color_data)
+
+    # This function is used to extract the data of a kinetic run, every "<>" block is one cycle
+    # The measurements are matched to blue and red by their "Name" label, a measurement without a color in its name gets the next free color
+    # For every well the metrics in kinetic_metrics (rate: slope over time, auc: area under the curve) are calculated, then averaged per sample
+    def Kinetic(self):
+        marker_indices = self._block_markers()
+
+        from Extraction.Kinetic import KineticExtractor  # Only needed for kinetic runs
+
+        extractor = KineticExtractor(self.df, self.sample_methods, self.sample_names, self.sample_positions, self.sample_dilutions,
+                                     geometry=self.layout.geometry if self.layout is not None else None)
+        colors = [(self.registry.color(method), self.registry.blank(method), method) for method in self.registry.methods_reading("blocks") if method in self.sample_methods]
+        full_data = ResultTable()
+        for (color, blank, method), markers in extractor.measurements(marker_indices, colors):
+            series = extractor.series(markers, blank, method)
+            self.kinetic_series[color] = series
+            print(f"🔹 {color}: {len(series.times)} cycles, {len(series.samples)} wells")
+            for metric in self.kinetic_metrics:
+                self._append_per_sample(full_data, f"{color}_{metric}", series.samples, series.metric(metric))
+        return full_data
+
+    # Adds the values of the wells to the results, either every well by itself or the average and standard deviation per sample
+    def _append_per_sample(self, full_data, method, well_samples, well_values):
+        values_by_name = {}
+        for name, value in zip(well_samples, well_values):
+            if not np.isnan(value):
+                values_by_name.setdefault(name, []).append(float(value))
+        unique_names = sorted(set(well_samples))
+
+        if self.return_individual:
+            samples = [name for name in unique_names for _ in values_by_name.get(name, [])]
+            replicates = [idx for name in unique_names for idx in range(1, len(values_by_name.get(name, [])) + 1)]
+            values = [value for name in unique_names for value in values_by_name.get(name, [])]
+            full_data.append(samples, method, "avg", values, replicates)
+            full_data.append(samples, method, "std", [0] * len(values), replicates)
+        else:
+            summary = summarize_groups(values_by_name, unique_names, self.statistics)
+            for statistic in self.statistics:
+                full_data.append(unique_names, method, statistic, summary[statistic])
+
+    # This function puts the values of all colors into one result table
+    # Either every value is given back by itself (return_individual) or the average and standard deviation of each sample
+    # Every sample gets a value for every color, empty if it was not measured with that color
+    # The averages are taken after converting the values of a color with convert (all samples at once), if given
+    def _collect_results(self, unique_names, color_data, convert=None):
+        full_data = ResultTable()
+
+        if self.return_individual:
+            # The samples themselves stay in the output as empty rows, the values are written to "<sample>_<n>"
+            for color in color_data:
+                full_data.append(unique_names, color, "avg", [None] * len(unique_names))
+                full_data.append(unique_names, color, "std", [None] * len(unique_names))
+
+            counts = {name: max(len(data.get(name, [])) for data in color_data.values()) for name in unique_names}
+            samples = [name for name in unique_names for _ in range(counts[name])]
+            replicates = [idx for name in unique_names for idx in range(1, counts[name] + 1)]
+            for color, data in color_data.items():
+                values, deviations = [], []
+                for name in unique_names:
+                    name_values = data.get(name, [])
+                    missing = counts[name] - len(name_values)
+                    values.extend(list(name_values) + [None] * missing)
+                    deviations.extend([0] * len(name_values) + [None] * missing)
+                full_data.append(samples, color, "avg", values, replicates)
+                full_data.append(samples, color, "std", deviations, replicates)
+        else:
+            # The statistics of all colors and samples are computed together
+            values_by_group = {}
+            for color, data in color_data.items():
+                if convert is not None and convert.get(color) is not None:
+                    data = self._convert_all(data, convert[color])
+                values_by_group.update({(color, name): values for name, values in data.items()})
+            keys = [(color, name) for color in color_data for name in unique_names]
+            summary = summarize_groups(values_by_group, keys, self.statistics)
+            for number, color in enumerate(color_data):
+                part = slice(number * len(unique_names), (number + 1) * len(unique_names))
+                for statistic in self.statistics:
+                    full_data.append(unique_names, color, statistic, summary[statistic][part])
+
+        return full_data
+
+    # Converts the values of all samples in one array and splits them up by sample again
+    @staticmethod
+    def _convert_all(data, convert):
+        names = list(data)
+        if not names:
+            return data
+        lengths = [len(data[name]) for name in names]
+        converted = convert(np.concatenate([np.asarray(data[name], dtype=float) for name in names]))
+        return {name: values.tolist() for name, values in zip(names, np.split(converted, np.cumsum(lengths)[:-1]))}
@@ -0,0 +1,5 @@
+class ExtractionError(Exception):
+    """
+    A file could not be evaluated, e.g. because of a typo in its "Ex" rows or missing "<>" blocks.
+    Only this file fails: main.py moves it to the quarantine folder and goes on with the other files (see "quarantine_folder").
+    """
@@ -1,9 +1,12 @@
 import pandas as pd
 import numpy as np
 from collections import defaultdict
+from ReadAndWrite.ResultTable import ResultTable
+from Extraction.Transformation.avg_std import summarize_groups
+from Extraction.Spectral import SpectralExtractor, reads_544_rows, select_fluorescence
 
 class FluorescenceProcessor:
-    def __init__(self, dataframe, sample_methods, sample_names, sample_dilutions, return_individual):
+    def __init__(self, dataframe, sample_methods, sample_names, sample_dilutions, return_individual, layout=None, selection=None, statistics=("avg", "std")):
         self.sample_methods = sample_methods
         self.sample_names = sample_names
         self.sample_dilutions = sample_dilutions
@@ -12,36 +15,75 @@ class FluorescenceProcessor:
         self.values_set_2 = []
         self.result_by_sample = defaultdict(list)
         self.return_individual = return_individual
+        self.layout = layout
+        self.selection = selection  # (how, wavelength), see "wavelength_selection" in main.py, None uses the "544" rows
+        self.blank_sets = None  # Blank of every sample per set, only set when the values come from the whole scans
+        self.statistics = statistics
+
+    # Entry point for the Coordinator, see Extraction/Registry.py
+    @classmethod
+    def extract(cls, dataframe, layout, settings):
+        processor = cls(dataframe, layout.methods, layout.samples, layout.dilutions, return_individual=settings["return_individual"],
+                        layout=layout, selection=settings["wavelength_selection"].get("f"), statistics=settings["statistics"])
+        return processor._extract_setup()
 
     def _extract_setup(self):
-        self.find_544_values()
+        if reads_544_rows(self.selection):
+            self.find_544_values()
+        else:
+            self.find_spectral_values()
         self.apply_blank_correction()
         full_data = self.compute_averages()
         return full_data
 
     def find_544_values(self):
-        matches = self.df[self.df.iloc[:, 0].astype(str) == "544"]
-        if len(matches) < 1:
+        if self.layout is not None:
+            rows = self.layout.fluorescence_rows
+        else:
+            rows = self.df.index[self.df.iloc[:, 0].astype(str) == "544"].tolist()
+        if len(rows) < 1:
             raise ValueError("No row starting with '544' found.")
-        elif len(matches) == 1:
+        elif len(rows) == 1:
             print("⚠️ Only one '544' row found. Fluorescence will be calculated with one replicate.")
-            idx1 = matches.index[0]
+            idx1 = rows[0]
             self.values_set_1 = self.df.iloc[idx1, 1:].tolist()
             self.values_set_2 = [None] * len(self.values_set_1)
         else:
-            idx1, idx2 = matches.index[:2]
+            idx1, idx2 = rows[:2]
             self.values_set_1 = self.df.iloc[idx1, 1:].tolist()
             self.values_set_2 = self.df.iloc[idx2, 1:].tolist()
 
-    def apply_blank_correction(self):
-        blank_1, blank_2 = 0, 0
+    # Reads the whole scans ("Wavel." tables) and takes the value of every sample at the wavelength chosen by self.selection
+    def find_spectral_values(self):
+        how, wavelength = self.selection
+        scans = SpectralExtractor(self.df).scans()
+        if len(scans) < 1:
+            raise ValueError("No scan ('Wavel.' row) found.")
+        n = len(self.sample_methods)
+        value_sets, self.blank_sets = [], []
+        for scan in scans[:2]:
+            values, blanks = select_fluorescence(scan, self.sample_methods, self.sample_dilutions, how, wavelength)
+            value_sets.append([None if np.isnan(v) else v for v in values])
+            self.blank_sets.append(blanks)
+        if len(scans) == 1:
+            print("⚠️ Only one scan found. Fluorescence will be calculated with one replicate.")
+            value_sets.append([None] * n)
+            self.blank_sets.append(np.zeros(n))
+        self.values_set_1, self.values_set_2 = value_sets
 
-        for i, method in enumerate(self.sample_methods):
-            if method == "Blank":
-                v1 = self._safe_float(self.values_set_1[i])
-                v2 = self._safe_float(self.values_set_2[i])
-                if v1 is not None: blank_1 = v1
-                if v2 is not None: blank_2 = v2
+    def apply_blank_correction(self):
+        if self.blank_sets is not None:
+            blanks_1, blanks_2 = self.blank_sets
+        else:
+            blank_1, blank_2 = 0, 0
+            for i, method in enumerate(self.sample_methods):
+                if method == "Blank":
+                    v1 = self._safe_float(self.values_set_1[i])
+                    v2 = self._safe_float(self.values_set_2[i])
+                    if v1 is not None: blank_1 = v1
+                    if v2 is not None: blank_2 = v2
+            blanks_1 = [blank_1] * len(self.sample_methods)
+            blanks_2 = [blank_2] * len(self.sample_methods)
 
         for i, method in enumerate(self.sample_methods):
             if method == "f":
@@ -50,43 +92,34 @@ class FluorescenceProcessor:
 
                 v1 = self._safe_float(self.values_set_1[i])
                 if v1 is not None:
-                    corrected_v1 = v1 * dilution - blank_1
+                    corrected_v1 = v1 * dilution - blanks_1[i]
                     self.result_by_sample[name].append(corrected_v1)
 
                 v2 = self._safe_float(self.values_set_2[i])
                 if v2 is not None:
-                    corrected_v2 = v2 * dilution - blank_2
+                    corrected_v2 = v2 * dilution - blanks_2[i]
                     self.result_by_sample[name].append(corrected_v2)
 
     def compute_averages(self):
         excluded_names = {"Blank", "BlankB", "BlankR"}
         unique_names = sorted({name for name in self.sample_names if name not in excluded_names})
 
-        full_data = {}
-
-        for name in unique_names:
-            values = self.result_by_sample.get(name, [])
-            clean_vals = [v for v in values if v is not None]
-
-            if self.return_individual:
-                for idx, val in enumerate(clean_vals, start=1):
-                    new_name = f"{name}_{idx}"
-                    full_data[new_name] = {
-                        "fluorescence_avg": val,
-                        "fluorescence_std": 0
-                    }
-            else:
-                if clean_vals:
-                    avg = np.mean(clean_vals)
-                    std = np.std(clean_vals, ddof=1) if len(clean_vals) > 1 else 0
-                else:
-                    avg = None
-                    std = None
-
-                full_data[name] = {
-                    "fluorescence_avg": avg,
-                    "fluorescence_std": std
-                }
+        full_data = ResultTable()
+
+        if self.return_individual:
+            samples, replicates, values = [], [], []
+            for name in unique_names:
+                clean_vals = [v for v in self.result_by_sample.get(name, []) if v is not None]
+                samples.extend([name] * len(clean_vals))
+                replicates.extend(range(1, len(clean_vals) + 1))
+                values.extend(clean_vals)
+            full_data.append(samples, "fluorescence", "avg", values, replicates)
+            full_data.append(samples, "fluorescence", "std", [0] * len(values), replicates)
+        else:
+            clean_values = {name: [v for v in self.result_by_sample.get(name, []) if v is not None] for name in unique_names}
+            summary = summarize_groups(clean_values, unique_names, self.statistics)
+            for statistic in self.statistics:
+                full_data.append(unique_names, "fluorescence", statistic, summary[statistic])
 
         return full_data
 
@@ -0,0 +1,197 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from Extraction.Reader.PlateGeometry import PlateGeometry
+
+# np.trapezoid was added in NumPy 2.0, older versions only have np.trapz
+trapezoid = getattr(np, "trapezoid", None) or np.trapz
+
+
+class KineticSeries:
+    """
+    The values of the sample wells over all cycles of a kinetic run, as one float array of shape (cycles, wells).
+    times holds the time of every cycle in seconds (or the cycle number if the export has no times), NaN marks a missing value.
+    """
+
+    # Metrics of a well that can be written to the output file (see "kinetic_metrics" in main.py): name -> function of the series
+    METRICS = {"rate": "rates", "auc": "auc"}
+
+    def __init__(self, times, values, samples):
+        self.times = np.asarray(times, dtype=float)
+        self.values = values
+        self.samples = list(samples)
+
+    @classmethod
+    def from_cycles(cls, cycles, n_cycles, samples):
+        """
+        Fills the array cycle by cycle from a generator of (time, values of the wells), without keeping anything else.
+        """
+        times = np.full(n_cycles, np.nan)
+        values = np.full((n_cycles, len(samples)), np.nan)
+        n = 0
+        for n, (time, cycle_values) in enumerate(cycles, start=1):
+            times[n - 1] = time
+            values[n - 1] = cycle_values
+        return cls(times[:n], values[:n], samples)
+
+    def rates(self):
+        """
+        Slope of every well over time (least squares), missing values are left out. NaN if a well has less than two values.
+        """
+        valid = ~np.isnan(self.values)
+        t = np.where(valid, self.times[:, None], 0.0)
+        y = np.where(valid, self.values, 0.0)
+        n = valid.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t_mean = t.sum(axis=0) / n
+            y_mean = y.sum(axis=0) / n
+            dt = np.where(valid, self.times[:, None] - t_mean, 0.0)
+            dy = np.where(valid, self.values - y_mean, 0.0)
+            slope = (dt * dy).sum(axis=0) / (dt * dt).sum(axis=0)
+        slope[n < 2] = np.nan
+        return slope
+
+    def auc(self):
+        """
+        Area under the curve of every well (trapezoidal rule over time). NaN if a value of the well is missing.
+        """
+        if len(self.times) < 2:
+            return np.full(len(self.samples), np.nan)
+        return trapezoid(self.values, self.times, axis=0)
+
+    def metric(self, name):
+        """
+        The values of a metric of METRICS for every well.
+        """
+        return getattr(self, self.METRICS[name])()
+
+
+class KineticExtractor:
+    """
+    Reads a kinetic run: every "<>" block is one cycle of the measurement.
+    The cycles are walked one after another as a generator, each cycle gives one blank-corrected and dilution-scaled array of the sample wells.
+    The time of a cycle is taken from the "Time [s]" row above its block.
+    """
+
+    TIME_LABEL = "Time [s]"
+    KEEP_LABELS = ("Name", TIME_LABEL)  # Rows the StreamReader has to keep for a kinetic run
+
+    def __init__(self, dataframe, sample_methods, sample_names, sample_positions, sample_dilutions, geometry=None):
+        self.df = dataframe
+        self.values = dataframe.to_numpy(dtype=object)  # One array for the whole sheet, the cycles only take slices of it
+        self.first_column = self.values[:, 0] if self.values.size else np.zeros(0, dtype=object)
+        self.sample_methods = [str(m).lower() for m in sample_methods]
+        self.sample_names = sample_names
+        self.sample_positions = sample_positions
+        self.sample_dilutions = sample_dilutions
+        self.geometry = geometry
+
+    def label_groups(self, marker_rows):
+        """
+        Groups the cycles by the name of their measurement (the "Name" row above the block, e.g. "blue" and "red"),
+        in the order the measurements first appear in the export. Gives back a dict label -> rows of the markers.
+        """
+        name_rows = np.flatnonzero(self.first_column == "Name")
+        groups = {}
+        for marker in marker_rows:
+            position = self.df.index.get_loc(marker)
+            above = name_rows[name_rows < position]
+            label = None
+            if len(above):
+                label = next((value for value in self.values[above[-1], 1:] if not pd.isna(value)), None)
+            groups.setdefault(label, []).append(marker)
+        return groups
+
+    def measurements(self, marker_rows, colors):
+        """
+        Matches the measurements to the colors by their label: the measurement named e.g. "blue" or "Red 450" gets that color.
+        colors is a list of (color, blank, method), a measurement without a color in its label gets the next color not taken yet.
+        Gives back (color, blank, method) and the rows of the markers for every color that was found, in the order of colors.
+        """
+        by_color = {}
+        unmatched = []
+        for label, markers in self.label_groups(marker_rows).items():
+            words = re.split(r"[\W_]+", str(label).lower()) if label is not None else []
+            entry = next((entry for entry in colors if entry[0] in words and entry[0] not in by_color), None)
+            if entry is None:
+                unmatched.append((label, markers))
+            else:
+                by_color[entry[0]] = (entry, markers)
+
+        free = [entry for entry in colors if entry[0] not in by_color]
+        for (label, markers), entry in zip(unmatched, free):
+            print(f"⚠️ The measurement '{label}' has no color in its name, its cycles are used as {entry[0]}.")
+            by_color[entry[0]] = (entry, markers)
+        return [by_color[entry[0]] for entry in colors if entry[0] in by_color]
+
+    def series(self, marker_rows, blank, method):
+        """
+        Collects all cycles of one method into a KineticSeries.
+        """
+        sample_cols = [i for i, m in enumerate(self.sample_methods) if m == method.lower()]
+        samples = [self.sample_names[i] for i in sample_cols]
+        cycles = self.cycles(marker_rows, blank, method)
+        return KineticSeries.from_cycles(cycles, len(marker_rows), samples)
+
+    def cycles(self, marker_rows, blank, method):
+        """
+        Gives back (time, values of the sample wells) for every cycle, the values are corrected like in the LS version:
+        the first blank with a value is subtracted, then the dilution is applied.
+        """
+        marker_rows = list(marker_rows)
+        if not marker_rows:
+            return
+        geometry = self.geometry or PlateGeometry.detect(self.df, marker_rows[0])
+        well_index = geometry.flat_index(self.sample_positions)
+        blank_cols = [i for i, m in enumerate(self.sample_methods) if m == blank.lower()]
+        sample_cols = [i for i, m in enumerate(self.sample_methods) if m == method.lower()]
+        dilutions = np.asarray([self._dilution(self.sample_dilutions[i]) for i in sample_cols])
+
+        previous = -1
+        for number, marker in enumerate(marker_rows, start=1):
+            position = self.df.index.get_loc(marker)
+            plate = self._read_block(position, geometry)
+            wells = np.full(len(self.sample_positions), np.nan)
+            valid = well_index >= 0
+            wells[valid] = plate[well_index[valid]]
+
+            blanks = wells[blank_cols]
+            blanks = blanks[~np.isnan(blanks)]
+            if len(blanks) == 0:
+                print(f"⚠️ No valid blank '{blank}' found in cycle {number}, the cycle is skipped.")
+                corrected = np.full(len(sample_cols), np.nan)
+            else:
+                corrected = (wells[sample_cols] - blanks[0]) * dilutions
+
+            yield self._cycle_time(previous, position, number), corrected
+            previous = position
+
+    # The values of one block as a flat float array of length n_rows * n_cols, empty or text cells are NaN
+    def _read_block(self, position, geometry):
+        block = self.values[position + 1:position + 1 + geometry.n_rows, 1:geometry.n_cols + 1]
+        numbers = pd.to_numeric(pd.Series(block.ravel()), errors="coerce").to_numpy(dtype=float)
+        plate = np.full((geometry.n_rows, geometry.n_cols), np.nan)
+        plate[:block.shape[0], :block.shape[1]] = numbers.reshape(block.shape)
+        return plate.ravel()
+
+    # The last "Time [s]" row between the previous block and this one, the cycle number if there is none
+    def _cycle_time(self, previous, position, number):
+        labels = self.first_column[previous + 1:position]
+        rows = np.flatnonzero(labels == self.TIME_LABEL)
+        if len(rows):
+            row = self.values[previous + 1 + rows[-1]]
+            for value in row[1:]:
+                try:
+                    return float(value)
+                except (TypeError, ValueError):
+                    continue
+        return float(number)
+
+    @staticmethod
+    def _dilution(value):
+        try:
+            return float(value) if value not in [None, ""] else 1.0
+        except (TypeError, ValueError):
+            return 1.0
@@ -1,63 +1,51 @@
+import numpy as np
 import pandas as pd
 
-class BlockReader:
-    def __init__(self, dataframe, marker_index, sample_methods, sample_names, sample_positions, blank, method):
-        self.blank = blank.lower()
-        self.method = method.lower()
-        self.df = dataframe
-        self.idx = marker_index
-        self.sample_methods = sample_methods
-        self.sample_names = sample_names
-        self.sample_positions = sample_positions
-        self.block = None
-        self.blank_value = None
-        self.sample_data = {}
+from Extraction.Reader.PlateGeometry import PlateGeometry
 
-    def process_block(self):
-        try:
-            self._extract_block()
-            self._find_blank()
-            self._extract_corrected_sample_values()
-        except Exception as e:
-            raise RuntimeError(f"BlockReader failed at marker index {self.idx}: {e}")
-        return self.sample_data
+class BlockArray:
+    """
+    Loads all "<>" blocks of a file at once into one float array of shape (n_blocks, n_rows, n_cols).
+    The size of the blocks is detected from the first block (see PlateGeometry), so 96-, 384- and 1536-well plates are read the same way.
+    Empty or non-numeric cells become NaN and are treated as missing.
+    """
 
-    def _extract_block(self):
-        try:
-            self.block = self.df.iloc[self.idx+1:self.idx+9, :13]
-            self.block.columns = ['Row'] + list(range(1, 13))
-            self.block.set_index('Row', inplace=True)
-        except Exception as e:
-            raise ValueError(f"Could not extract or format block starting at index {self.idx}: {e}")
+    def __init__(self, dataframe, marker_indices, geometry=None):
+        self.marker_indices = list(marker_indices)
+        if geometry is None:
+            geometry = PlateGeometry.detect(dataframe, self.marker_indices[0]) if self.marker_indices else PlateGeometry()
+        self.geometry = geometry
+        self.n_rows = geometry.n_rows
+        self.n_cols = geometry.n_cols
+        self.values = np.full((len(self.marker_indices), self.n_rows, self.n_cols), np.nan)
+        self._load(dataframe)
 
-    def _find_blank(self):
-        for i, method in enumerate(self.sample_methods):
-            if method.lower() == self.blank:
-                row, col = self.sample_positions[i]
-                val = self._get_value(row, col)
-                if val is not None:
-                    self.blank_value = val
-                    #print(f"✅ Found blank value {val} at position ({row}, {col})")
-                    return
-        raise ValueError(f"No valid blank '{self.blank}' found in block at index {self.idx}")
+    def _load(self, dataframe):
+        if not self.marker_indices:
+            return
+        # All block rows are taken in one go, rows that do not exist at the end of the sheet stay NaN
+        rows = np.add.outer(np.asarray(self.marker_indices), np.arange(1, self.n_rows + 1)).ravel()
+        inside = rows < len(dataframe)
+        block_rows = dataframe.iloc[rows[inside], :self.n_cols + 1]
+        numeric = block_rows.iloc[:, 1:].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
 
-    def _extract_corrected_sample_values(self):
-        for i, method in enumerate(self.sample_methods):
-            if method.lower() == self.method:
-                row, col = self.sample_positions[i]
-                name = self.sample_names[i]
-                raw_val = self._get_value(row, col)
-                if raw_val is not None:
-                    corrected = raw_val - self.blank_value
-                    self.sample_data.setdefault(name, []).append(corrected)
-                    #print(f"🔹 {name}: raw={raw_val}, corrected={corrected}")
-                else:
-                    print(f"⚠️ Missing value for sample '{name}' at ({row}, {col})")
+        flat = np.full((len(rows), self.n_cols), np.nan)
+        flat[inside, :numeric.shape[1]] = numeric
+        self.values = flat.reshape(len(self.marker_indices), self.n_rows, self.n_cols)
 
-    def _get_value(self, row, col):
-        try:
-            val = self.block.at[row, col]
-            return float(val) if pd.notnull(val) else None
-        except Exception as e:
-            print(f"⚠️ Failed to read value at ({row}, {col}): {e}")
-            return None
+    def well_index(self, sample_positions):
+        """
+        Maps positions like ['A', 1] to the flat index of the well inside a block, -1 if the well is not in the block.
+        """
+        return self.geometry.flat_index(sample_positions)
+
+    def well_values(self, well_index, blocks=None):
+        """
+        Gives back the values of the wells for the chosen blocks as an array of shape (n_blocks, n_wells), NaN if missing.
+        """
+        values = self.values if blocks is None else self.values[list(blocks)]
+        flat = values.reshape(len(values), -1)
+        result = np.full((len(values), len(well_index)), np.nan)
+        valid = well_index >= 0
+        result[:, valid] = flat[:, well_index[valid]]
+        return result
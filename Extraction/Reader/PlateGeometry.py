@@ -0,0 +1,136 @@
+import re
+
+import numpy as np
+
+
+class PlateGeometry:
+    """
+    Size of the plate of an export: number of rows and columns of the "<>" blocks.
+    Rows are labelled A-Z and then AA, AB, ... like the Spark does for 1536-well plates.
+    The positions of the samples are turned into flat indices of the wells (row * n_cols + column), so the values of all wells
+    can be taken from a block array at once.
+    """
+
+    # Standard plates by number of columns: 96 (8 x 12), 384 (16 x 24) and 1536 (32 x 48) wells
+    FORMATS = {12: 8, 24: 16, 48: 32}
+    LABEL = re.compile(r"^[A-Z]{1,2}$")
+    RANGE = re.compile(r"^([A-Z]{1,2})(\d+)-([A-Z]{1,2})(\d+)$")
+    SINGLE = re.compile(r"^([A-Z]{1,2})(\d+)$")
+
+    def __init__(self, n_rows=8, n_cols=12):
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+
+    def __repr__(self):
+        return f"PlateGeometry({self.n_rows} x {self.n_cols})"
+
+    @property
+    def n_wells(self):
+        return self.n_rows * self.n_cols
+
+    @classmethod
+    def from_header(cls, header):
+        """
+        Takes the size from the header of a "<>" block: the column numbers 1, 2, 3, ... after the marker.
+        The number of rows is the one of the standard plate with that many columns.
+        """
+        n_cols = 0
+        for value in list(header)[1:]:
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                break
+            if number != n_cols + 1:
+                break
+            n_cols += 1
+        if n_cols == 0:
+            return cls()
+        return cls(cls.FORMATS.get(n_cols, max(1, n_cols * 2 // 3)), n_cols)
+
+    @classmethod
+    def detect(cls, dataframe, marker_row):
+        """
+        Finds the size of the block starting at marker_row: the columns from its header, the rows from the row labels below it.
+        """
+        position = dataframe.index.get_loc(marker_row)
+        geometry = cls.from_header(dataframe.iloc[position].tolist())
+        first_column = dataframe.iloc[position + 1:position + 1 + max(cls.FORMATS.values()), 0].tolist()
+        n_rows = 0
+        for value in first_column:
+            if value != cls.row_label(n_rows):
+                break
+            n_rows += 1
+        if n_rows:
+            geometry.n_rows = n_rows
+        return geometry
+
+    @staticmethod
+    def row_label(number):
+        """
+        0 -> "A", 25 -> "Z", 26 -> "AA", ...
+        """
+        if number < 26:
+            return chr(ord("A") + number)
+        return chr(ord("A") + number // 26 - 1) + chr(ord("A") + number % 26)
+
+    @staticmethod
+    def row_number(label):
+        """
+        "A" -> 0, "Z" -> 25, "AA" -> 26, ... -1 if the label is not a row.
+        """
+        label = str(label)
+        if not PlateGeometry.LABEL.match(label):
+            return -1
+        number = 0
+        for char in label:
+            number = number * 26 + (ord(char) - ord("A") + 1)
+        return number - 1
+
+    @classmethod
+    def parse_positions(cls, pos_string):
+        """
+        Turns a position string like 'A1-A12;B1-B11' into positions [['A', 1], ['A', 2], ..., ['B', 11]].
+        Rows can have two letters (e.g. 'AA1-AF48') for 1536-well plates.
+        Gives back the positions and the parts of the string that are no position.
+        """
+        positions = []
+        invalid = []
+        for part in pos_string.split(';'):
+            part = part.strip()
+
+            # A range like A1-A12 or B3-B9
+            range_match = cls.RANGE.match(part)
+            if range_match:
+                start_row, start_col, end_row, end_col = range_match.groups()
+                start_row, end_row = cls.row_number(start_row), cls.row_number(end_row)
+                for row in range(start_row, end_row + 1):
+                    for col in range(int(start_col), int(end_col) + 1):
+                        positions.append([cls.row_label(row), col])
+                continue
+
+            # A single position like G1
+            single_match = cls.SINGLE.match(part)
+            if single_match:
+                row, col = single_match.groups()
+                positions.append([row, int(col)])
+                continue
+
+            invalid.append(part)
+        return positions, invalid
+
+    def flat_index(self, positions):
+        """
+        Maps positions like ['A', 1] to the flat index of the well inside a block, -1 if the well is not on the plate.
+        The row labels are converted once per distinct label, the rest is done with numpy.
+        """
+        if len(positions) == 0:
+            return np.zeros(0, dtype=int)
+        labels = np.asarray([row for row, _ in positions], dtype=object)
+        cols = np.asarray([col for _, col in positions], dtype=float)
+        distinct, inverse = np.unique(labels.astype(str), return_inverse=True)
+        rows = np.asarray([self.row_number(label) for label in distinct])[inverse]
+
+        valid = (rows >= 0) & (rows < self.n_rows) & (cols >= 1) & (cols <= self.n_cols)
+        index = np.full(len(positions), -1, dtype=int)
+        index[valid] = rows[valid] * self.n_cols + (cols[valid].astype(int) - 1)
+        return index
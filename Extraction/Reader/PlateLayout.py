@@ -0,0 +1,54 @@
+from ReadAndWrite.Name_Reader import ReadNames
+from Extraction.Reader.PlateGeometry import PlateGeometry
+
+
+class PlateLayout:
+    """
+    Indexes a sheet once and keeps everything the extractors need to find their data:
+    the rows of the anchors ("Ex", "Plate area", "<>" and "544"), the size of the plate and the sample names, methods, dilutions and positions.
+    Like this, the sheet does not have to be searched again by every extractor.
+    """
+
+    def __init__(self, dataframe, filename):
+        self.df = dataframe
+        self.filename = filename
+        self.ex_rows = []
+        self.plate_area_row = None
+        self.marker_rows = []
+        self.fluorescence_rows = []
+        self.geometry = None
+        self.samples = []
+        self.methods = []
+        self.dilutions = []
+        self.positions = []
+
+    def build(self):
+        self._index_anchors()
+        self._read_names()
+        return self
+
+    # Finds all anchors in one pass over the sheet, the comparisons are done by numpy instead of looping over the rows
+    def _index_anchors(self):
+        values = self.df.to_numpy(dtype=object)
+        if values.size == 0:
+            return
+        labels = self.df.index.to_numpy()
+        first_column = values[:, 0]
+
+        self.marker_rows = labels[first_column == "<>"].tolist()
+        if self.marker_rows:
+            self.geometry = PlateGeometry.detect(self.df, self.marker_rows[0])
+        self.fluorescence_rows = labels[first_column.astype(str) == "544"].tolist()
+        self.ex_rows = labels[(values == "Ex").any(axis=1)].tolist()
+        plate_area_rows = labels[(values == "Plate area").any(axis=1)].tolist()
+        if plate_area_rows:
+            self.plate_area_row = plate_area_rows[-1]  # The Name_Reader always used the last one
+
+    # Reads the names, methods, dilutions and positions at the anchors found before
+    def _read_names(self):
+        name_reader = ReadNames(self.df, self.filename, anchors=(self.ex_rows, self.plate_area_row))
+        name_reader.read_setup()
+        self.samples = name_reader.samples
+        self.methods = name_reader.methods
+        self.positions = name_reader.positions
+        self.dilutions = name_reader.dilutions
@@ -0,0 +1,106 @@
+import importlib
+import json
+from pathlib import Path
+
+
+class MethodRegistry:
+    """
+    Knows which extractor and which transformation belong to a method code of the "Ex" rows, and which function of the
+    AbsorptionCoordinator belongs to a Version. Everything is read from a config file (Extraction/Methods.json):
+
+    extractors: name -> "module:Class", the class needs a classmethod extract(df, layout, settings) giving back a ResultTable
+    methods: method code -> {"extractor": name, "transformation": "module:Class" or null, "blank": method code of its blank,
+                             "reads": "blocks" (the "<>" blocks) or "scans" (the "544" rows or the "Wavel." scans),
+                             for methods reading blocks also "color": name in the output file and "blocks": [first, last + 1] block for LS and Raw},
+             the class needs a classmethod load() and a function converter(method, Version) (see Transformation/Concentration.py)
+    versions: Version -> name of the function of the AbsorptionCoordinator
+    blocks_needed: Version -> number of "<>" blocks a file needs for the methods reading blocks (see ReadAndWrite/HeaderCheck.py)
+
+    The modules are only imported the first time they are used, so a plate without e.g. fluorescence never imports the fluorescence code.
+    A new assay is added by writing its extractor and adding it to the config file.
+    """
+
+    DEFAULT_CONFIG = Path(__file__).parent / "Methods.json"
+    _loaded = {}  # Registries by config file, every file is read only once per process
+
+    def __init__(self, config):
+        self.extractors = config.get("extractors", {})
+        self.methods = config.get("methods", {})
+        self.versions = config.get("versions", {})
+        self.blocks_needed = config.get("blocks_needed", {})
+        self._objects = {}
+
+    @classmethod
+    def load(cls, config_path=None):
+        config_path = Path(config_path or cls.DEFAULT_CONFIG)
+        if config_path not in cls._loaded:
+            with open(config_path, "r", encoding="utf-8") as f:
+                cls._loaded[config_path] = cls(json.load(f))
+        return cls._loaded[config_path]
+
+    def extractors_for(self, sample_methods):
+        """
+        Gives back (name, extractor class) for every extractor needed by the method codes of a file, in the order of the config file.
+        """
+        present = set(sample_methods)
+        needed = {entry["extractor"] for code, entry in self.methods.items() if code in present}
+        return [(name, self._import(reference)) for name, reference in self.extractors.items() if name in needed]
+
+    def transformation(self, method, Version):
+        """
+        Function that converts an array of values of the method with the Version, None if they are not converted.
+        """
+        reference = self.methods.get(method, {}).get("transformation")
+        if reference is None:
+            return None
+        return self._import(reference).load().converter(method, Version)
+
+    def version(self, Version):
+        """
+        Name of the function of the AbsorptionCoordinator for this Version, None if the Version is not known.
+        """
+        return self.versions.get(Version)
+
+    def blank(self, method):
+        """
+        Method code of the blank of a method, None if the method has no blank.
+        """
+        return self.methods.get(method, {}).get("blank")
+
+    def reads(self, method):
+        """
+        What a method is read from: "blocks", "scans" or None.
+        """
+        return self.methods.get(method, {}).get("reads")
+
+    def methods_reading(self, reads):
+        """
+        The method codes read from "blocks" or "scans", in the order of the config file.
+        """
+        return [method for method in self.methods if self.reads(method) == reads]
+
+    def blanks(self):
+        """
+        The method codes of all blanks.
+        """
+        return {self.blank(method) for method in self.methods} - {None}
+
+    def color(self, method):
+        """
+        Name of the measurement of a method in the output file ("blue", "red"), the method code if none is given.
+        """
+        return self.methods.get(method, {}).get("color", method)
+
+    def blocks(self, method):
+        """
+        The "<>" blocks a method is read from for LS and Raw, e.g. range(0, 2) for the first two blocks.
+        """
+        first, end = self.methods.get(method, {}).get("blocks", (0, 0))
+        return range(first, end)
+
+    # Imports "module:Name" the first time it is needed
+    def _import(self, reference):
+        if reference not in self._objects:
+            module_name, _, attribute = reference.partition(":")
+            self._objects[reference] = getattr(importlib.import_module(module_name), attribute)
+        return self._objects[reference]
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+
+class Spectrum:
+    """
+    One scan of the export as an array of shape (wavelengths, wells).
+    The columns are in the order of the export, which is the order of the samples in the "Ex" rows.
+    """
+
+    def __init__(self, wavelengths, values, wells):
+        self.wavelengths = np.asarray(wavelengths, dtype=float)
+        self.values = values
+        self.wells = list(wells)
+
+    def rows_for(self, how, wavelength, corrected):
+        """
+        Chooses one wavelength (row) per well:
+        "fixed" the row of exactly this wavelength, "nearest" the row closest to it, "peak" the highest corrected value of every well.
+        Gives back the row of every well, -1 if nothing could be chosen.
+        A scan without any wavelength row (e.g. a cut off export) cannot be evaluated and raises a ValueError.
+        """
+        n_wells = corrected.shape[1]
+        if len(self.wavelengths) == 0:
+            raise ValueError("A scan ('Wavel.' row) has no wavelength rows, the export may be cut off.")
+        if how == "peak":
+            has_value = ~np.isnan(corrected).all(axis=0)
+            rows = np.full(n_wells, -1)
+            rows[has_value] = np.nanargmax(corrected[:, has_value], axis=0)
+            return rows
+        if how == "nearest":
+            return np.full(n_wells, int(np.argmin(np.abs(self.wavelengths - float(wavelength)))))
+        if how == "fixed":
+            matches = np.flatnonzero(self.wavelengths == float(wavelength))
+            if len(matches) == 0:
+                print(f"⚠️ Wavelength {wavelength} not found in the scan ({self.wavelengths.min():g}-{self.wavelengths.max():g}).")
+                return np.full(n_wells, -1)
+            return np.full(n_wells, matches[0])
+        raise ValueError(f"Unknown wavelength selection '{how}', please use 'fixed', 'nearest' or 'peak'.")
+
+
+class SpectralExtractor:
+    """
+    Finds all scans of an export ("Wavel." followed by one row per wavelength) and reads each of them into a Spectrum in one step.
+    """
+
+    HEADER = "Wavel."
+
+    def __init__(self, dataframe):
+        self.df = dataframe
+
+    def scans(self):
+        values = self.df.to_numpy(dtype=object)
+        if values.size == 0:
+            return []
+        first_column = pd.to_numeric(pd.Series(values[:, 0]), errors="coerce").to_numpy(dtype=float)
+        is_wavelength = ~np.isnan(first_column)
+        headers = np.flatnonzero(values[:, 0] == self.HEADER)
+
+        spectra = []
+        for header in headers:
+            # The scan goes on as long as the first cell is a wavelength
+            end = header + 1
+            while end < len(values) and is_wavelength[end]:
+                end += 1
+            wells = [well for well in values[header, 1:] if not pd.isna(well)]
+            block = values[header + 1:end, 1:len(wells) + 1]
+            numbers = pd.to_numeric(pd.Series(block.ravel()), errors="coerce").to_numpy(dtype=float).reshape(block.shape)
+            spectra.append(Spectrum(first_column[header + 1:end], numbers, wells))
+        return spectra
+
+
+# This function tells whether a selection (see "wavelength_selection" in main.py) is exactly the "544" rows of the export,
+# these rows hold the values at 544 nm, so the scans do not have to be read
+def reads_544_rows(selection):
+    if selection is None:
+        return True
+    how, wavelength = selection
+    try:
+        return how == "fixed" and float(wavelength) == 544
+    except (TypeError, ValueError):
+        return False
+
+
+# This function corrects a scan for the fluorescence like FluorescenceProcessor does (dilution first, then the blank)
+# and chooses the wavelength of every sample. The blank is the last "Blank" well with a value, separately for every wavelength.
+# Gives back the raw values and the blank values at the chosen wavelengths, one per sample, NaN if missing.
+def select_fluorescence(spectrum, sample_methods, sample_dilutions, how, wavelength):
+    n = min(len(sample_methods), spectrum.values.shape[1])
+    raw = np.full((len(spectrum.wavelengths), len(sample_methods)), np.nan)
+    raw[:, :n] = spectrum.values[:, :n]
+
+    blank_cols = [i for i, method in enumerate(sample_methods) if method == "Blank"]
+    blank = np.zeros(len(spectrum.wavelengths))
+    for i in blank_cols:
+        blank = np.where(np.isnan(raw[:, i]), blank, raw[:, i])
+
+    dilutions = pd.to_numeric(pd.Series(sample_dilutions, dtype=object), errors="coerce").to_numpy(dtype=float)
+    dilutions = np.pad(dilutions, (0, max(0, len(sample_methods) - len(dilutions))), constant_values=np.nan)[:len(sample_methods)]
+    corrected = raw * dilutions - blank[:, None]
+
+    rows = spectrum.rows_for(how, wavelength, corrected)
+    chosen = rows >= 0
+    cols = np.arange(len(sample_methods))
+    values = np.full(len(sample_methods), np.nan)
+    blanks = np.zeros(len(sample_methods))
+    values[chosen] = raw[rows[chosen], cols[chosen]]
+    blanks[chosen] = blank[rows[chosen]]
+    return values, blanks
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+class ConcentrationTable:
+    """
+    Converts absorbances into concentrations with the law of Beer-Lambert: value * factor / extinction / path_length → mol/L.
+    The coefficients are read from a table (Coefficients.csv) with one row per Version and method code:
+
+    factor: dilution of the measurement
+    extinction: molar extinction coefficient of the pigment in L/(mol*cm)
+    path_length: height of the liquid in the well in cm
+
+    A new pigment is a new row of the table. Methods without a row are not converted.
+    """
+
+    DEFAULT_TABLE = Path(__file__).parent / "Coefficients.csv"
+    _loaded = {}  # Tables by file, every file is read only once per process
+
+    def __init__(self, table):
+        self.coefficients = {
+            (str(row.Version), str(row.method)): (float(row.factor), float(row.extinction), float(row.path_length))
+            for row in table.itertuples(index=False)
+        }
+
+    @classmethod
+    def load(cls, table_path=None):
+        table_path = Path(table_path or cls.DEFAULT_TABLE)
+        if table_path not in cls._loaded:
+            cls._loaded[table_path] = cls(pd.read_csv(table_path))
+        return cls._loaded[table_path]
+
+    def converter(self, method, Version):
+        """
+        Function that converts an array of values of the method, None if the table has no row for it.
+        """
+        if (Version, method) not in self.coefficients:
+            return None
+        return lambda values: self.convert(values, method, Version)
+
+    def convert(self, values, method, Version):
+        """
+        Converts all values at once, e.g. all samples of a plate. Missing values stay NaN.
+        """
+        values = np.asarray(values, dtype=float)
+        factor, extinction, path_length = self.coefficients[(Version, method)]
+        return values * factor / extinction / path_length
@@ -1,9 +1,56 @@
 import numpy as np
 
-def compute_averages_and_deviations(values):
-    if not values:
-        print("⚠️ No valid values to compute statistics.")
-        return None, None
-    avg = np.mean(values)
-    std = np.std(values, ddof=1) if len(values) > 1 else 0
-    return avg, std
\ No newline at end of file
+# Statistics of the replicates that can be written to the output file (see "statistics" in main.py)
+# n: number of values, avg: average, std: sample standard deviation (0 for one value), cv: std / avg (empty if avg is 0), sem: std / sqrt(n)
+STATISTICS = ("n", "avg", "std", "cv", "sem")
+
+
+# This function computes all statistics for many groups at once: codes holds the group (0 ... n_groups - 1) of every value
+# Gives back a dict with one array per statistic, one entry per group. Groups without a value are NaN, missing values are left out.
+def grouped_statistics(codes, values, n_groups):
+    codes = np.asarray(codes, dtype=int)
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+
+    n = np.bincount(codes, minlength=n_groups).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg = np.bincount(codes, weights=values, minlength=n_groups) / n
+        squares = np.bincount(codes, weights=(values - avg[codes]) ** 2, minlength=n_groups)
+        std = np.where(n > 1, np.sqrt(squares / (n - 1)), 0.0)
+        std[n == 0] = np.nan
+        cv = std / avg
+        sem = std / np.sqrt(n)
+    cv[~np.isfinite(cv)] = np.nan  # An average of 0 (e.g. blank-corrected values that cancel out) has no cv
+    n[n == 0] = np.nan
+    return {"n": n, "avg": avg, "std": std, "cv": cv, "sem": sem}
+
+
+# This function gives back the statistics of a group from its running sums: the number of values n, their mean
+# and m2, the sum of the squared differences to the mean (Welford). Gives the same values as grouped_statistics, NaN for n = 0.
+def statistics_from_moments(n, mean, m2):
+    if not n:
+        return {statistic: np.nan for statistic in STATISTICS}
+    std = float(np.sqrt(max(m2, 0.0) / (n - 1))) if n > 1 else 0.0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cv = float(np.float64(std) / mean)
+    if not np.isfinite(cv):
+        cv = np.nan
+    return {"n": float(n), "avg": float(mean), "std": std, "cv": cv, "sem": std / float(np.sqrt(n))}
+
+
+# This function gives back the chosen statistics of the groups in keys (e.g. sample names), as lists in the order of keys
+# values_by_group holds the replicate values of every group, keys without values get None
+def summarize_groups(values_by_group, keys, statistics=("avg", "std")):
+    groups = [key for key in keys if len(values_by_group.get(key, []))]
+    lengths = [len(values_by_group[key]) for key in groups]
+    codes = np.repeat(np.arange(len(groups)), lengths)
+    values = np.concatenate([np.asarray(values_by_group[key], dtype=float) for key in groups]) if groups else np.zeros(0)
+    result = grouped_statistics(codes, values, len(groups))
+
+    position = {key: i for i, key in enumerate(groups)}
+    summary = {}
+    for statistic in statistics:
+        summary[statistic] = [None if key not in position or np.isnan(result[statistic][position[key]]) else float(result[statistic][position[key]])
+                              for key in keys]
+    return summary
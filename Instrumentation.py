@@ -0,0 +1,160 @@
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+"""
+Measures how long the steps of the evaluation take (wall time and CPU time) and how much memory they need at most.
+The steps are marked in the code with:
+
+    with stage("read", file_name):
+        ...
+
+As long as the instrumentation is not enabled (see "instrumentation" in main.py), stage() does nothing.
+"""
+
+
+class Instrumentation:
+    """
+    Collects one record per step and file: stage, file, wall time, CPU time and the peak of the memory allocated during the step.
+    Steps can be nested (e.g. "read" inside "file"), the times of a step include the steps inside it.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.profile_file = None
+        self.profile_folder = None
+        self.records = []
+        self._stack = []  # Peak memory seen by the running steps, the innermost last
+
+    def configure(self, enabled=False, memory=True, profile_file=None, profile_folder=None):
+        self.enabled = enabled
+        self.memory = enabled and memory
+        self.profile_file = profile_file
+        self.profile_folder = profile_folder
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    # The settings are given to the worker processes, so they can measure their files the same way
+    def settings(self):
+        return {"enabled": self.enabled, "memory": self.memory, "profile_file": self.profile_file, "profile_folder": self.profile_folder}
+
+    def stage(self, name, file=None):
+        if not self.enabled:
+            return _NOT_MEASURED
+        return self._measure(name, file)
+
+    @contextlib.contextmanager
+    def _measure(self, name, file):
+        start_memory = 0
+        if self.memory:
+            start_memory, peak = tracemalloc.get_traced_memory()
+            self._remember_peak(peak)
+            tracemalloc.reset_peak()
+        self._stack.append(0)
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = time.process_time() - start_cpu
+            peak = self._stack.pop()
+            record = {"stage": name, "file": file, "wall_s": round(wall, 6), "cpu_s": round(cpu, 6), "pid": os.getpid()}
+            if self.memory:
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                self._remember_peak(peak)
+                record["peak_mb"] = round((peak - start_memory) / 1e6, 3)
+            self.records.append(record)
+
+    # tracemalloc has only one peak, so before it is reset the peak is passed on to all steps that are still running
+    def _remember_peak(self, peak):
+        for i in range(len(self._stack)):
+            self._stack[i] = max(self._stack[i], peak)
+
+    def profile(self, file_path):
+        """
+        Runs cProfile while the given file is evaluated, if it is the file chosen in "profile_file".
+        The statistics are saved next to the run report and the slowest functions are printed.
+        """
+        if self.profile_file is None or os.path.basename(str(file_path)) != self.profile_file:
+            return _NOT_MEASURED
+        return self._profile(file_path)
+
+    @contextlib.contextmanager
+    def _profile(self, file_path):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            name = Path(file_path).stem
+            folder = Path(self.profile_folder) if self.profile_folder is not None else Path(file_path).parent
+            folder.mkdir(parents=True, exist_ok=True)
+            stats_path = folder / f"profile {name}.prof"
+            profiler.dump_stats(stats_path)
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(15)
+            print(f"🔬 Profile of {os.path.basename(str(file_path))} saved at {stats_path}")
+            print(text.getvalue())
+
+    def take_records(self):
+        """
+        Gives back the records collected so far and starts a new list (used by the worker processes).
+        """
+        records, self.records = self.records, []
+        return records
+
+    def add_records(self, records):
+        self.records.extend(records)
+
+    def summary(self):
+        """
+        Adds up the records per stage: number of calls, wall and CPU time and the highest memory peak.
+        """
+        stages = {}
+        for record in self.records:
+            total = stages.setdefault(record["stage"], {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_mb": None})
+            total["calls"] += 1
+            total["wall_s"] += record["wall_s"]
+            total["cpu_s"] += record["cpu_s"]
+            if "peak_mb" in record:
+                total["peak_mb"] = max(total["peak_mb"] or 0.0, record["peak_mb"])
+        return stages
+
+    def write_report(self, report_path):
+        """
+        Saves all records and the summary as json and prints the summary as a table.
+        """
+        if not self.enabled:
+            return
+        summary = self.summary()
+        report = {"created": datetime.now().isoformat(timespec="seconds"), "memory": self.memory, "summary": summary, "records": self.records}
+        report_path = Path(report_path)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+        print(f"\n{'stage':<14} {'calls':>6} {'wall [s]':>10} {'cpu [s]':>10} {'peak [MB]':>10}")
+        for name, total in summary.items():
+            peak = f"{total['peak_mb']:>10.2f}" if total["peak_mb"] is not None else f"{'-':>10}"
+            print(f"{name:<14} {total['calls']:>6} {total['wall_s']:>10.3f} {total['cpu_s']:>10.3f} {peak}")
+        print(f"📊 Run report saved at {report_path}")
+
+
+_NOT_MEASURED = contextlib.nullcontext()
+
+# The instrumentation of this process, used by all modules
+instrumentation = Instrumentation()
+
+
+def stage(name, file=None):
+    return instrumentation.stage(name, file)
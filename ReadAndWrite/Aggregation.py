@@ -0,0 +1,150 @@
+import numpy as np
+
+from Extraction.Transformation.avg_std import statistics_from_moments
+from ReadAndWrite.ResultTable import ResultTable
+
+
+# This function pools two groups of values given by their running sums (n, mean, m2), see statistics_from_moments
+# Chan's formula, so the values themselves are not needed
+def combine_moments(a, b):
+    n_a, mean_a, m2_a = a
+    n_b, mean_b, m2_b = b
+    n = n_a + n_b
+    if n == 0:
+        return 0.0, 0.0, 0.0
+    delta = mean_b - mean_a
+    return n, mean_a + delta * n_b / n, m2_a + m2_b + delta * delta * n_a * n_b / n
+
+
+# This function takes a group b out of the pooled group total again, the inverse of combine_moments
+def subtract_moments(total, b):
+    n, mean, m2 = total
+    n_b, mean_b, m2_b = b
+    n_a = n - n_b
+    if n_a <= 0:
+        return 0.0, 0.0, 0.0
+    mean_a = (n * mean - n_b * mean_b) / n_a
+    delta = mean_b - mean_a
+    return n_a, mean_a, max(0.0, m2 - m2_b - delta * delta * n_a * n_b / n)
+
+
+class ReplicateAggregates:
+    """
+    Pools the replicates of a sample over all input files instead of letting the latest file overwrite the earlier averages.
+    For every sample, method and source file the running sums of its replicates (n, mean, m2) are saved in the results store,
+    together with the pooled sums over all files. A new file is added to the pooled sums of its samples in one step,
+    without reading the older files again. A file that is evaluated again first takes its old contribution out,
+    and a file that is removed (see remove_sources) is taken out of all its samples.
+    The files report "n", "avg" and "std" of every sample, m2 is std² * (n - 1).
+    """
+
+    SOURCES_TABLE = "replicate_sources"
+    POOLED_TABLE = "replicate_pooled"
+    MOMENTS = ("n", "avg", "std")  # Statistics every file has to report
+
+    def __init__(self, connection, statistics=("avg", "std")):
+        self.connection = connection
+        self.statistics = list(statistics)
+        with self.connection:
+            self.connection.execute(f'CREATE TABLE IF NOT EXISTS {self.SOURCES_TABLE} ("Sample" TEXT, "method" TEXT, "source" TEXT, '
+                                    f'"n" REAL, "mean" REAL, "m2" REAL, PRIMARY KEY ("Sample", "method", "source"))')
+            self.connection.execute(f'CREATE INDEX IF NOT EXISTS {self.SOURCES_TABLE}_source ON {self.SOURCES_TABLE} ("source")')
+            self.connection.execute(f'CREATE TABLE IF NOT EXISTS {self.POOLED_TABLE} ("Sample" TEXT, "method" TEXT, '
+                                    f'"n" REAL, "mean" REAL, "m2" REAL, "files" INTEGER, PRIMARY KEY ("Sample", "method"))')
+
+    def add(self, result_table):
+        """
+        Adds the results of the files in result_table to the pooled sums.
+        Gives back a ResultTable with the pooled statistics of every touched sample (and the number of files in "<method>_files"),
+        all other results of the table are passed on unchanged.
+        """
+        frame = result_table.to_frame()
+        is_moment = (frame["replicate"] == 0) & frame["metric"].isin(["n", "avg", "std", "cv", "sem"])
+        moments = frame[is_moment & frame["metric"].isin(self.MOMENTS)].drop_duplicates(["sample", "method", "source", "metric"], keep="last")
+        moments = moments.pivot(index=["sample", "method", "source"], columns="metric", values="value").reindex(columns=list(self.MOMENTS))
+
+        contributions = {}
+        for (sample, method, source), (n, avg, std) in zip(moments.index, moments.to_numpy(dtype=float)):
+            if np.isnan(n) or n <= 0 or np.isnan(avg):
+                continue
+            m2 = 0.0 if n <= 1 or np.isnan(std) else std * std * (n - 1)
+            contributions.setdefault(source, []).append((sample, method, (float(n), float(avg), m2)))
+
+        touched = {}
+        with self.connection:
+            # A file that was added before (e.g. changed since the last run) replaces its old contribution
+            for source in dict.fromkeys(result_table.data["source"]):
+                if source is not None:
+                    self._take_out(source, touched)
+            for source, rows in contributions.items():
+                for sample, method, part in rows:
+                    pooled = self._pooled(sample, method, touched)
+                    touched[(sample, method)] = (*combine_moments(pooled[:3], part), pooled[3] + 1)
+                self.connection.executemany(f'INSERT OR REPLACE INTO {self.SOURCES_TABLE} VALUES (?, ?, ?, ?, ?, ?)',
+                                            [(sample, method, source, *part) for sample, method, part in rows])
+            self._save(touched)
+
+        pooled = self._to_table(touched)
+        pooled.extend(self._rows(frame[~is_moment]))
+        return pooled
+
+    def remove_sources(self, sources):
+        """
+        Takes all results of the given files out of the pooled sums.
+        Gives back a ResultTable with the new pooled statistics of their samples, empty for samples without any file left.
+        """
+        touched = {}
+        with self.connection:
+            for source in sources:
+                self._take_out(source, touched)
+            self._save(touched)
+        return self._to_table(touched)
+
+    def sources(self, sample):
+        """
+        The files that contributed to a sample, by method.
+        """
+        query = f'SELECT "method", "source" FROM {self.SOURCES_TABLE} WHERE "Sample" = ? ORDER BY "method", "source"'
+        by_method = {}
+        for method, source in self.connection.execute(query, (sample,)):
+            by_method.setdefault(method, []).append(source)
+        return by_method
+
+    # This function subtracts the saved contribution of a file from the pooled sums of its samples
+    def _take_out(self, source, touched):
+        query = f'SELECT "Sample", "method", "n", "mean", "m2" FROM {self.SOURCES_TABLE} WHERE "source" = ?'
+        for sample, method, n, mean, m2 in self.connection.execute(query, (source,)).fetchall():
+            pooled = self._pooled(sample, method, touched)
+            touched[(sample, method)] = (*subtract_moments(pooled[:3], (n, mean, m2)), pooled[3] - 1)
+        self.connection.execute(f'DELETE FROM {self.SOURCES_TABLE} WHERE "source" = ?', (source,))
+
+    # The pooled sums of a sample (n, mean, m2, files), the ones changed in this step first
+    def _pooled(self, sample, method, touched):
+        if (sample, method) in touched:
+            return touched[(sample, method)]
+        row = self.connection.execute(f'SELECT "n", "mean", "m2", "files" FROM {self.POOLED_TABLE} WHERE "Sample" = ? AND "method" = ?',
+                                      (sample, method)).fetchone()
+        return tuple(row) if row is not None else (0.0, 0.0, 0.0, 0)
+
+    def _save(self, touched):
+        kept = [(sample, method, *pooled) for (sample, method), pooled in touched.items() if pooled[3] > 0 and pooled[0] > 0]
+        emptied = [(sample, method) for (sample, method), pooled in touched.items() if pooled[3] <= 0 or pooled[0] <= 0]
+        self.connection.executemany(f'INSERT OR REPLACE INTO {self.POOLED_TABLE} VALUES (?, ?, ?, ?, ?, ?)', kept)
+        self.connection.executemany(f'DELETE FROM {self.POOLED_TABLE} WHERE "Sample" = ? AND "method" = ?', emptied)
+
+    # The pooled statistics in the layout of the output file, a sample without any file left gets empty cells
+    def _to_table(self, touched):
+        table = ResultTable()
+        for (sample, method), (n, mean, m2, files) in touched.items():
+            values = statistics_from_moments(n if files > 0 else 0, mean, m2)
+            for statistic in self.statistics:
+                table.append([sample], method, statistic, [None if np.isnan(values[statistic]) else values[statistic]])
+            table.append([sample], method, "files", [files if files > 0 else None])
+        return table
+
+    @staticmethod
+    def _rows(frame):
+        table = ResultTable()
+        for column in ResultTable.COLUMNS:
+            table.data[column] = frame[column].tolist()
+        return table
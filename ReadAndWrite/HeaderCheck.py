@@ -0,0 +1,184 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import repeat
+from pathlib import Path
+
+import openpyxl
+
+from Extraction.Reader.PlateGeometry import PlateGeometry
+from Extraction.Registry import MethodRegistry
+from Extraction.Spectral import reads_544_rows
+from ReadAndWrite.Stream_Reader import StreamReader
+
+
+class HeaderCheck:
+    """
+    Checks the layout of a Spark export before it is evaluated, without reading any measured value:
+    the three "Ex" rows (names, methods, dilutions) and the "Plate area" must fit together, every method needs its blank
+    ("Blank", "BlankB", "BlankR"), and the file needs the "<>" blocks and "544" rows (or "Wavel." scans) the Version and methods read.
+    Only the first cell of every row is looked at, the "Ex", "Plate area" and "<>" rows are the only rows converted.
+    What a method needs is taken from the registry (Extraction/Methods.json).
+    """
+
+    def __init__(self, file_path, Version, wavelength_selection=None, registry=None):
+        self.file_path = Path(file_path)
+        self.Version = Version
+        self.wavelength_selection = wavelength_selection or {}
+        self.registry = registry or MethodRegistry.load()
+
+    def check(self):
+        """
+        Gives back the report of the file: "status" is "ok", "warning" or "error", with the "errors" and "warnings" found.
+        """
+        start = time.perf_counter()
+        report = {"file": self.file_path.name, "status": "ok", "errors": [], "warnings": []}
+        try:
+            header = self._read_header()
+        except Exception as e:
+            report["errors"].append(f"The file could not be opened as an Excel file ({type(e).__name__}: {e})")
+        else:
+            self._check_header(header, report)
+        if report["errors"]:
+            report["status"] = "error"
+        elif report["warnings"]:
+            report["status"] = "warning"
+        report["seconds"] = round(time.perf_counter() - start, 4)
+        return report
+
+    # This function goes through the rows once and keeps only what the checks need
+    def _read_header(self):
+        header = {"ex_rows": [], "plate_area": None, "block_headers": [], "rows_544": 0, "scans": 0}
+        workbook = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            for values in workbook.worksheets[0].iter_rows(values_only=True):
+                if not values:
+                    continue
+                first = StreamReader._convert(values[0])
+                if first == "<>":
+                    header["block_headers"].append([StreamReader._convert(value) for value in values])
+                elif first == "Wavel.":
+                    header["scans"] += 1
+                elif str(first) == "544":
+                    header["rows_544"] += 1
+                if "Ex" in values:
+                    header["ex_rows"].append([StreamReader._convert(value) for value in values])
+                if "Plate area" in values:  # The last one is used, like in the evaluation (see PlateLayout)
+                    header["plate_area"] = [StreamReader._convert(value) for value in values]
+        finally:
+            workbook.close()
+        return header
+
+    def _check_header(self, header, report):
+        errors, warnings = report["errors"], report["warnings"]
+
+        # Names, methods and dilutions after the three "Ex"
+        if len(header["ex_rows"]) < 3:
+            errors.append(f"Found {len(header['ex_rows'])} row(s) with 'Ex', 3 are needed (names, methods, dilutions)")
+            return
+        samples, methods, dilutions = (StreamReader._read_methods(row) for row in header["ex_rows"][:3])
+        report["samples"] = len(samples)
+
+        # Positions after "Plate area"
+        positions = []
+        if header["plate_area"] is None:
+            errors.append("No row with 'Plate area' found")
+        else:
+            row = header["plate_area"]
+            pos_string = next((str(value) for value in row[row.index("Plate area") + 1:] if value is not None), None)
+            if pos_string is None:
+                errors.append("No position string found after 'Plate area'")
+            else:
+                positions, invalid = PlateGeometry.parse_positions(pos_string)
+                for part in invalid:
+                    errors.append(f"'{part}' in the plate area is not a position or a range of positions")
+
+        counts = {"names": len(samples), "methods": len(methods), "dilutions": len(dilutions), "positions": len(positions)}
+        if len(set(counts.values())) > 1:
+            errors.append("Count mismatch: " + ", ".join(f"{count} {kind}" for kind, count in counts.items()))
+
+        for dilution in dilutions:
+            try:
+                float(dilution)
+            except ValueError:
+                errors.append(f"Dilution '{dilution}' is not a number")
+
+        # Every method needs its blank, method codes that are neither a method nor a blank are ignored by the evaluation
+        blanks = self.registry.blanks()
+        used = sorted(set(methods) & set(self.registry.methods))
+        for method in used:
+            blank = self.registry.blank(method)
+            if blank is not None and blank not in methods:
+                errors.append(f"Method '{method}' is used but its blank '{blank}' is missing")
+        unknown = sorted(set(methods) - set(self.registry.methods) - blanks)
+        if unknown:
+            warnings.append(f"Unknown method code(s) {', '.join(repr(code) for code in unknown)}, these wells are not evaluated")
+
+        # The blocks and scans the methods read
+        reads = {self.registry.reads(method) for method in used}
+        report["blocks"] = len(header["block_headers"])
+        if "blocks" in reads:
+            needed = self.registry.blocks_needed.get(self.Version, 1)
+            if report["blocks"] < needed:
+                errors.append(f"Found {report['blocks']} '<>' block(s), Version {self.Version} needs {needed}")
+            if header["block_headers"]:
+                geometry = PlateGeometry.from_header(header["block_headers"][0])
+                outside = [f"{row}{col}" for row, col in positions if not (0 <= PlateGeometry.row_number(row) < geometry.n_rows and 1 <= col <= geometry.n_cols)]
+                if outside:
+                    errors.append(f"Position(s) {', '.join(outside[:5])}{' ...' if len(outside) > 5 else ''} are outside the {geometry.n_wells}-well plate")
+        if "scans" in reads:
+            if reads_544_rows(self.wavelength_selection.get("f")):
+                report["fluorescence_rows"] = header["rows_544"]
+                if header["rows_544"] == 0:
+                    errors.append("No row starting with '544' found for the fluorescence")
+                elif header["rows_544"] == 1:
+                    warnings.append("Only one '544' row found, the fluorescence has one replicate")
+            else:
+                report["fluorescence_rows"] = header["scans"]
+                if header["scans"] == 0:
+                    errors.append("No scan ('Wavel.' row) found for the fluorescence")
+
+
+# This function checks one file in a separate process, a file that cannot be checked is reported instead of stopping the others
+def check_file(file_path, Version, wavelength_selection=None):
+    try:
+        return HeaderCheck(file_path, Version, wavelength_selection).check()
+    except Exception as e:
+        return {"file": Path(file_path).name, "status": "error", "errors": [f"The check failed ({type(e).__name__}: {e})"], "warnings": []}
+
+
+# This function checks all given files of a folder, with several processes if workers > 1
+# Gives back the report: the settings, a summary and the reports of the files in the order of the files
+def check_folder(input_folder, files, Version, wavelength_selection=None, workers=1):
+    start = time.perf_counter()
+    paths = [os.path.join(input_folder, file_name) for file_name in files]
+    workers = max(1, min(int(workers), len(paths)))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunksize = max(1, len(paths) // (4 * workers))
+            files_report = list(executor.map(check_file, paths, repeat(Version), repeat(wavelength_selection), chunksize=chunksize))
+    else:
+        files_report = [check_file(path, Version, wavelength_selection) for path in paths]
+
+    statuses = [entry["status"] for entry in files_report]
+    return {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "input_folder": str(input_folder),
+        "Version": Version,
+        "wavelength_selection": {method: list(selection) for method, selection in (wavelength_selection or {}).items()},
+        "summary": {"files": len(files_report), "ok": statuses.count("ok"), "warning": statuses.count("warning"),
+                    "error": statuses.count("error"), "seconds": round(time.perf_counter() - start, 3)},
+        "files": files_report,
+    }
+
+
+# This function saves the report as JSON, the old report is only replaced once the new one is written completely
+def write_report(report, report_path):
+    report_path = Path(report_path)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = report_path.with_name(report_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, report_path)
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+def file_hash(full_path):
+    """
+    Computes the sha256 of the file content, read in chunks so large files are not loaded at once.
+    """
+    digest = hashlib.sha256()
+    with open(full_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RunManifest:
+    """
+    Remembers which input files were already processed, so that a later run only has to extract new or changed files.
+    The manifest is saved as a json file next to the output file.
+    Every entry keeps the settings that change the results (e.g. Version, return_individual, statistics, see setup._manifest_settings in main.py),
+    a file processed with other settings is processed again.
+    """
+
+    def __init__(self, output_file_path):
+        self.output_file_path = Path(output_file_path)
+        self.manifest_path = self.output_file_path.with_name(f"{self.output_file_path.stem} manifest.json")
+        self.entries = {}
+        self._hashes = {}  # Hashes computed during this run, so no file is hashed twice
+        self._load()
+
+    def _load(self):
+        """
+        Loads the manifest of the last runs. If the output file is missing, all files have to be processed again.
+        """
+        if not self.manifest_path.exists():
+            return
+        if not self.output_file_path.exists():
+            print(f"⚠️ Output file not found, ignoring the run manifest at {self.manifest_path}")
+            return
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("files", {})
+        except Exception as e:
+            print(f"⚠️ Could not read the run manifest at {self.manifest_path}, all files will be processed: {e}")
+            self.entries = {}
+
+    def save(self):
+        """
+        Writes the manifest to a temporary file first, so a crash never leaves a broken manifest behind.
+        """
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def needs_processing(self, file_name, full_path, settings):
+        """
+        Checks whether a file is new, changed or was processed with other settings.
+        Size and modification time are compared first, the content hash is only computed if those differ.
+        """
+        entry = self.entries.get(file_name)
+        if entry is None or not self._same_settings(entry, settings):
+            return True
+
+        stat = os.stat(full_path)
+        if entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime_ns:
+            return False
+
+        # The file was touched, but maybe the content is still the same (e.g. copied again into the folder)
+        if entry.get("sha256") == self.file_hash(full_path):
+            entry["mtime"] = stat.st_mtime_ns
+            return False
+        return True
+
+    def find_processed_duplicate(self, file_name, full_path, settings):
+        """
+        Returns the name of an already processed file with exactly the same content and settings, or None.
+        """
+        content_hash = self.file_hash(full_path)
+        for other_name, entry in sorted(self.entries.items()):
+            if other_name == file_name:
+                continue
+            if entry.get("sha256") == content_hash and self._same_settings(entry, settings):
+                return other_name
+        return None
+
+    def record(self, file_name, full_path, settings, sample_keys, duplicate_of=None):
+        """
+        Saves how a file was processed and which samples it produced.
+        For a skipped file with the same content as another file, duplicate_of names that other file.
+        """
+        stat = os.stat(full_path)
+        self.entries[file_name] = {
+            "sha256": self.file_hash(full_path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            **self._json(settings),
+            "samples": sorted(map(str, sample_keys)),
+        }
+        if duplicate_of is not None:
+            self.entries[file_name]["duplicate_of"] = duplicate_of
+
+    # An entry without one of the settings (e.g. from an older version of the script) counts as processed with other settings
+    def _same_settings(self, entry, settings):
+        return all(key in entry and entry[key] == value for key, value in self._json(settings).items())
+
+    # The settings as they are saved in the json file (tuples become lists), so they compare equal after loading
+    @staticmethod
+    def _json(settings):
+        return json.loads(json.dumps(settings))
+
+    def forget(self, file_name):
+        """
+        Removes a file from the manifest, so it is processed again if it comes back. Files recorded as its duplicates are forgotten as well.
+        """
+        self.entries.pop(file_name, None)
+        for other_name in [name for name, entry in self.entries.items() if entry.get("duplicate_of") == file_name]:
+            del self.entries[other_name]
+
+    def file_hash(self, full_path):
+        """
+        Returns the content hash of a file, every file is only hashed once per run unless it changes.
+        """
+        full_path = str(full_path)
+        stat = os.stat(full_path)
+        cached = self._hashes.get(full_path)
+        if cached is not None and cached[0] == (stat.st_size, stat.st_mtime_ns):
+            return cached[1]
+        content_hash = file_hash(full_path)
+        self._hashes[full_path] = ((stat.st_size, stat.st_mtime_ns), content_hash)
+        return content_hash
@@ -1,12 +1,16 @@
 import pandas as pd
-import re
+
+from Extraction.Errors import ExtractionError
+from Extraction.Reader.PlateGeometry import PlateGeometry
 
 class ReadNames:
     
-    def __init__(self, dataframe, filename):
+    # anchors can be given as (rows containing "Ex", row containing "Plate area") if the sheet was already indexed (see PlateLayout)
+    def __init__(self, dataframe, filename, anchors=None):
         self.filename = filename
         self.df = dataframe
         self.positions = []
+        self.anchors = anchors
 
     def read_setup(self):
         first_ex_row = None
@@ -18,24 +22,27 @@ class ReadNames:
         # The "Ex" is where one should have the sample names and methods
         # The "Plate area" is where the used wells are and is part of the regular documentation in the Excel file.
         try:
-            for idx, row in self.df.iterrows():
-                if 'Ex' in row.values.tolist():
-                    if first_ex_row is None:
-                        first_ex_row = idx
-                    elif first_ex_row is not None and second_ex_row is None:
-                        second_ex_row = idx
-                    elif first_ex_row is not None and second_ex_row is not None and third_ex_row is None:
-                        third_ex_row = idx
-                if 'Plate area' in row.values.tolist():
-                    plate_area_row = idx
+            if self.anchors is not None:
+                ex_rows, plate_area_row = self.anchors
+                first_ex_row, second_ex_row, third_ex_row = (list(ex_rows[:3]) + [None] * 3)[:3]
+            else:
+                for idx, row in self.df.iterrows():
+                    if 'Ex' in row.values.tolist():
+                        if first_ex_row is None:
+                            first_ex_row = idx
+                        elif first_ex_row is not None and second_ex_row is None:
+                            second_ex_row = idx
+                        elif first_ex_row is not None and second_ex_row is not None and third_ex_row is None:
+                            third_ex_row = idx
+                    if 'Plate area' in row.values.tolist():
+                        plate_area_row = idx
 
             if first_ex_row is None or second_ex_row is None or third_ex_row is None:
                 raise ValueError("Could not find three rows containing 'Ex'")
             if plate_area_row is None:
                 raise ValueError("Could not find row containing 'Plate area'")
         except Exception as e:
-            print(f"❌ Failed to locate labels in {self.filename}. Reason: {e}")
-            return
+            raise ExtractionError(f"Failed to locate labels in {self.filename}. Reason: {e}") from e
 
         # Step 2: Get sample names -> putting the names after the first "Ex" in a list
         try:
@@ -46,8 +53,7 @@ class ReadNames:
                     break
                 self.samples.append(str(cell))
         except Exception as e:
-            print(f"❌ Failed to read sample names in {self.filename}. Reason: {e}")
-            return
+            raise ExtractionError(f"Failed to read sample names in {self.filename}. Reason: {e}") from e
 
         # Step 3: Get method codes -> putting the methoods after the second "Ex" in a list
         try:
@@ -58,8 +64,7 @@ class ReadNames:
                     break
                 self.methods.append(str(cell))
         except Exception as e:
-            print(f"❌ Failed to read method codes in {self.filename}. Reason: {e}")
-            return
+            raise ExtractionError(f"Failed to read method codes in {self.filename}. Reason: {e}") from e
 
         # Step 4: Get dilutions -> putting the dilutions after the third "Ex" in a list
         try:
@@ -70,8 +75,7 @@ class ReadNames:
                     break
                 self.dilutions.append(str(cell))
         except Exception as e:
-            print(f"❌ Failed to read method codes in {self.filename}. Reason: {e}")
-            return
+            raise ExtractionError(f"Failed to read dilutions in {self.filename}. Reason: {e}") from e
         
         # Step 5: Get position string -> finding and saving the string after "Plate area"
         try:
@@ -85,16 +89,14 @@ class ReadNames:
             if pos_string is None:
                 raise ValueError("No non-empty position string found after 'Plate area'")
         except Exception as e:
-            print(f"❌ Failed to read plate area string in {self.filename}. Reason: {e}")
-            return
+            raise ExtractionError(f"Failed to read plate area string in {self.filename}. Reason: {e}") from e
 
         # Step 6: Parse position string -> converting the string into a list of positions (e.g. from 'A1-A12;B1-B11' to [['A', 1], ..., ['B', 11]])
         try:
             print(f"Parsing plate positions from string: {pos_string}")
             self.positions = self._parse_position_string(pos_string)
         except Exception as e:
-            print(f"❌ Failed to parse plate positions in {self.filename}. Reason: {e}")
-            return
+            raise ExtractionError(f"Failed to parse plate positions in {self.filename}. Reason: {e}") from e
 
         # Step 7: Check length consistency -> ensuring that the number of samples, methods, and positions match
         try:
@@ -116,33 +118,9 @@ class ReadNames:
             print(f"❌ Failed during consistency check in {self.filename}. Reason: {e}")
 
     # This function parses a position string like 'A1-A12;B1-B11' into a list of positions that will look like [['A', 1], ['A', 2], ..., ['B', 11]]
+    # Rows can have two letters (e.g. 'AA1-AF48') for 1536-well plates
     def _parse_position_string(self, pos_string):
-        positions = []
-        ranges = pos_string.split(';')
-        for r in ranges:
-            r = r.strip()
-
-            # Check for a range like A1-A12 or B3-B9
-            range_match = re.match(r'^([A-Z])(\d+)-([A-Z])(\d+)$', r)
-            if range_match:
-                start_row, start_col, end_row, end_col = range_match.groups()
-                start_row, end_row = ord(start_row), ord(end_row)
-                start_col, end_col = int(start_col), int(end_col)
-
-                for row in range(start_row, end_row + 1):
-                    for col in range(start_col, end_col + 1):
-                        positions.append([chr(row), col])
-                continue  # Skip to next entry
-
-            # Check for a single position like G1
-            single_match = re.match(r'^([A-Z])(\d+)$', r)
-            if single_match:
-                row, col = single_match.groups()
-                positions.append([row, int(col)])
-                continue
-
-            # If neither match, warn the user
-            print(f"⚠️ Invalid format: '{r}' → Skipping.")
+        positions, invalid = PlateGeometry.parse_positions(pos_string)
+        for part in invalid:
+            print(f"⚠️ Invalid format: '{part}' → Skipping.")  # If neither a range nor a single position, warn the user
         return positions
-
-
@@ -0,0 +1,77 @@
+import json
+import os
+import shutil
+import traceback
+from datetime import datetime
+from pathlib import Path
+
+
+class Quarantine:
+    """
+    Collects the input files that could not be evaluated during a run and moves them to the quarantine folder at the end.
+    Every failure is added to "Error report.json" in that folder (file, time, type of error, message and traceback),
+    so the files can be fixed and put back into the input folder later.
+    """
+
+    REPORT_NAME = "Error report.json"
+
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        self.report_path = self.folder / self.REPORT_NAME
+        self.failures = []
+
+    def record(self, file_name, full_path, error):
+        """
+        Remembers a failed file, the run goes on with the next one.
+        """
+        print(f"❌ Failed to process {file_name}: {error}")
+        self.failures.append({
+            "file": file_name,
+            "path": str(full_path),
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "error": type(error).__name__,
+            "message": str(error),
+            "traceback": "".join(traceback.format_exception(type(error), error, error.__traceback__)),
+        })
+
+    def commit(self):
+        """
+        Moves the failed files into the quarantine folder and adds them to the error report.
+        A file with the same name already in the folder is kept, the new one gets the time as suffix.
+        """
+        if not self.failures:
+            return
+        self.folder.mkdir(parents=True, exist_ok=True)
+        for failure in self.failures:
+            source = Path(failure["path"])
+            target = self.folder / source.name
+            if target.exists():
+                target = target.with_name(f"{target.stem} {datetime.now():%Y-%m-%d %H-%M-%S}{target.suffix}")
+            try:
+                shutil.move(str(source), str(target))
+                failure["quarantined_as"] = str(target)
+            except Exception as e:
+                print(f"⚠️ Could not move {source.name} to the quarantine folder: {e}")
+                failure["quarantined_as"] = None
+
+        report = self._load_report() + self.failures
+        tmp_path = self.report_path.with_name(self.report_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.report_path)
+
+        print(f"\n🚧 {len(self.failures)} file(s) could not be evaluated and were moved to {self.folder}:")
+        for failure in self.failures:
+            print(f"   - {failure['file']}: {failure['message']}")
+        print(f"   Details are in {self.report_path}")
+        self.failures = []
+
+    def _load_report(self):
+        if not self.report_path.exists():
+            return []
+        try:
+            with open(self.report_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not read the error report at {self.report_path}, a new one is started: {e}")
+            return []
@@ -0,0 +1,178 @@
+import math
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from ReadAndWrite.SortKey import natural_sort_key, sort_key_name
+
+
+class ResultStore:
+    """
+    Keeps the results in a SQLite database instead of the Excel file.
+    Every sample is one row with the sample name as key, so new results only touch the rows of their samples.
+    The Excel file can be exported from the database whenever it is needed (see SortResult.export_store).
+    The sort key of every sample is saved when the sample is added, so the rows can be read in order through an index
+    without sorting them again. If the sort key function changes, the keys of all samples are computed again once.
+    """
+
+    TABLE = "results"
+    SETTINGS_TABLE = "store_settings"
+    SORT_COLUMN = "_sort_key"
+
+    def __init__(self, db_path, columns, excel_path=None, sort_key=natural_sort_key):
+        self.db_path = Path(db_path)
+        self.columns = columns
+        self.sort_key = sort_key
+        is_new = not self.db_path.exists()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.db_path)
+        self.connection.execute(f'CREATE TABLE IF NOT EXISTS {self.TABLE} ("Sample" TEXT PRIMARY KEY)')
+        self.connection.execute(f'CREATE TABLE IF NOT EXISTS {self.SETTINGS_TABLE} ("name" TEXT PRIMARY KEY, "value" TEXT)')
+        self._add_missing_columns([self.SORT_COLUMN] + self.columns[1:])
+        self.connection.execute(f'CREATE INDEX IF NOT EXISTS {self.TABLE}_order ON {self.TABLE} ("{self.SORT_COLUMN}", "Sample")')
+
+        # The results collected in the Excel file before the database was used are taken over once
+        if is_new and excel_path is not None and Path(excel_path).exists():
+            self._import_excel(excel_path)
+        self._update_sort_keys()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def upsert(self, result_table):
+        """
+        Adds new samples and overwrites the values that were set in the results, all other values are kept.
+        Gives back the samples that already existed and the ones that were added.
+        """
+        incoming, present = result_table.to_wide()
+        incoming = incoming.loc[:, [col for col in incoming.columns if col in self.columns]]
+        present = present.loc[:, incoming.columns]
+        keys = sorted(result_table.keys())
+        existing = self._existing_samples(keys)
+        already_present = [name for name in keys if name in existing]
+        newly_added = [name for name in keys if name not in existing]
+
+        with self.connection:
+            self.connection.executemany(
+                f'INSERT OR IGNORE INTO {self.TABLE} ("Sample", "{self.SORT_COLUMN}") VALUES (?, ?)',
+                [(name, self.sort_key(name)) for name in newly_added]
+            )
+            # Samples with the same set columns are written together with one statement
+            groups = {}
+            for name, row in zip(present.index, present.to_numpy(dtype=bool)):
+                groups.setdefault(tuple(incoming.columns[row]), []).append(name)
+            for columns, names in groups.items():
+                if not columns:
+                    continue
+                assignments = ", ".join(f'"{col}" = ?' for col in columns)
+                rows = [
+                    [self._to_sql(incoming.at[name, col]) for col in columns] + [name]
+                    for name in names
+                ]
+                self.connection.executemany(f'UPDATE {self.TABLE} SET {assignments} WHERE "Sample" = ?', rows)
+
+        return already_present, newly_added
+
+    def add_columns(self, columns):
+        """
+        Adds columns that are not in the store yet, e.g. when the results bring new ones.
+        """
+        self.columns = self.columns + [col for col in columns if col not in self.columns]
+        self._add_missing_columns(self.columns[1:])
+
+    def get(self, samples):
+        """
+        Looks up the rows of some samples by their key.
+        """
+        samples = list(samples)
+        frames = []
+        for start in range(0, len(samples), 500):
+            chunk = samples[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            frames.append(pd.read_sql_query(f'SELECT {self._selected_columns()} FROM {self.TABLE} WHERE "Sample" IN ({placeholders})',
+                                            self.connection, params=chunk))
+        if not frames:
+            return pd.DataFrame(columns=self._data_columns())
+        return pd.concat(frames, ignore_index=True)
+
+    def read_all(self):
+        """
+        Gives back all samples in the order of their sort key, read along the index.
+        """
+        query = f'SELECT {self._selected_columns()} FROM {self.TABLE} ORDER BY "{self.SORT_COLUMN}", "Sample"'
+        return pd.read_sql_query(query, self.connection)
+
+    def _existing_samples(self, samples):
+        existing = set()
+        for start in range(0, len(samples), 500):
+            chunk = samples[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            query = f'SELECT "Sample" FROM {self.TABLE} WHERE "Sample" IN ({placeholders})'
+            existing.update(row[0] for row in self.connection.execute(query, chunk))
+        return existing
+
+    def _table_columns(self):
+        return [row[1] for row in self.connection.execute(f"PRAGMA table_info({self.TABLE})")]
+
+    # The sort key is only used to order the rows, it is not part of the results
+    def _data_columns(self):
+        return [col for col in self._table_columns() if col != self.SORT_COLUMN]
+
+    def _selected_columns(self):
+        return ", ".join(f'"{col}"' for col in self._data_columns())
+
+    # This function saves the sort key of the samples that have none yet (e.g. taken over from the Excel file or from an older store)
+    # and of all samples if the store was sorted with another sort key function before
+    def _update_sort_keys(self):
+        name = sort_key_name(self.sort_key)
+        row = self.connection.execute(f'SELECT "value" FROM {self.SETTINGS_TABLE} WHERE "name" = ?', ("sort_key",)).fetchone()
+        changed = row is None or row[0] != name
+        query = f'SELECT "Sample" FROM {self.TABLE}' + ("" if changed else f' WHERE "{self.SORT_COLUMN}" IS NULL')
+        samples = [sample for (sample,) in self.connection.execute(query)]
+        if not samples and not changed:
+            return
+        with self.connection:
+            self.connection.executemany(f'UPDATE {self.TABLE} SET "{self.SORT_COLUMN}" = ? WHERE "Sample" = ?',
+                                        [(self.sort_key(sample), sample) for sample in samples])
+            self.connection.execute(f'INSERT OR REPLACE INTO {self.SETTINGS_TABLE} ("name", "value") VALUES (?, ?)', ("sort_key", name))
+
+    def _add_missing_columns(self, columns):
+        present = set(self._table_columns())
+        with self.connection:
+            for col in columns:
+                if col not in present:
+                    self.connection.execute(f'ALTER TABLE {self.TABLE} ADD COLUMN "{col}"')
+
+    def _import_excel(self, excel_path):
+        df = pd.read_excel(excel_path)
+        if "Sample" not in df.columns:
+            return
+        self._add_missing_columns([col for col in df.columns if col != "Sample"])
+        df = df.drop_duplicates(subset="Sample", keep="last")
+        columns = list(df.columns)
+        quoted = ", ".join(f'"{col}"' for col in columns)
+        placeholders = ", ".join("?" * len(columns))
+        rows = [[self._to_sql(value) for value in row] for row in df.itertuples(index=False)]
+        with self.connection:
+            self.connection.executemany(f"INSERT OR REPLACE INTO {self.TABLE} ({quoted}) VALUES ({placeholders})", rows)
+        print(f"📥 Took over {len(rows)} samples from {excel_path} into {self.db_path}")
+
+    # SQLite has no NaN, empty values are saved as NULL. Numpy numbers are turned into normal Python numbers.
+    @staticmethod
+    def _to_sql(value):
+        if value is None:
+            return None
+        if hasattr(value, "item"):
+            value = value.item()
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        if not isinstance(value, (int, float, str, bytes)):
+            return str(value)
+        return value
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+
+class ResultTable:
+    """
+    Collects the results in a long format: one row per sample, replicate, method and metric.
+    The extractors append whole columns at once and the tables of several files are merged with a single concat.
+
+    replicate is 0 for values of a whole sample (e.g. the average), individual values are numbered from 1.
+    In the output file such a value is written as "<sample>_<replicate>" and the column is "<method>_<metric>".
+    """
+
+    COLUMNS = ["sample", "replicate", "method", "metric", "value", "source"]
+
+    def __init__(self, source=None):
+        self.source = source
+        self.data = {column: [] for column in self.COLUMNS}
+
+    def __len__(self):
+        return len(self.data["sample"])
+
+    def append(self, samples, method, metric, values, replicates=0, source=None):
+        """
+        Appends one row per sample. method, metric, replicates and source can be a single value used for all rows.
+        """
+        samples = list(samples)
+        n = len(samples)
+        values = [np.nan if value is None else value for value in values]
+        if len(values) != n:
+            raise ValueError(f"Got {n} samples but {len(values)} values for {method}_{metric}.")
+
+        self.data["sample"].extend(samples)
+        self.data["value"].extend(values)
+        for column, given in (("replicate", replicates), ("method", method), ("metric", metric), ("source", source if source is not None else self.source)):
+            if isinstance(given, (list, tuple, np.ndarray, range)):
+                self.data[column].extend(given)
+            else:
+                self.data[column].extend([given] * n)
+
+    def extend(self, other):
+        """
+        Appends all rows of another table. Rows without a source get the source of this table.
+        """
+        for column in self.COLUMNS:
+            if column == "source":
+                self.data[column].extend(self.source if source is None else source for source in other.data[column])
+            else:
+                self.data[column].extend(other.data[column])
+
+    @classmethod
+    def concat(cls, tables):
+        merged = cls()
+        for table in tables:
+            merged.extend(table)
+        return merged
+
+    @classmethod
+    def from_dict(cls, result_dict, source=None):
+        """
+        Builds a table from the older result format {sample: {"blue_avg": ..., ...}}.
+        """
+        table = cls(source=source)
+        for name, values in result_dict.items():
+            for column, value in values.items():
+                method, _, metric = column.rpartition("_")
+                table.append([name], method, metric, [value])
+        return table
+
+    def to_frame(self):
+        frame = pd.DataFrame(self.data, columns=self.COLUMNS)
+        frame["value"] = pd.to_numeric(frame["value"], errors="coerce")
+        frame["replicate"] = frame["replicate"].astype(int)
+        return frame
+
+    def keys(self):
+        """
+        The names of the rows in the output file, in the order they first appear.
+        """
+        return list(dict.fromkeys(self._key_column()))
+
+    def columns(self):
+        """
+        The columns of the output file that have values in this table, in the order they first appear.
+        """
+        return list(dict.fromkeys(self._output_columns()))
+
+    def cells(self):
+        """
+        Gives back (output row name, output column, value) for every row, in the order they were added.
+        """
+        return zip(self._key_column(), self._output_columns(), self.data["value"])
+
+    def to_wide(self):
+        """
+        Turns the table into the layout of the output file: one row per sample and one column per method and metric.
+        Gives back the values and a mask telling which cells were set, as a value may also be set to empty on purpose.
+        If the same cell was set more than once, the last value wins.
+        """
+        frame = self.to_frame()
+        frame["key"] = pd.Series(self._key_column(), dtype=object)
+        frame["column"] = pd.Series(self._output_columns(), dtype=object)
+        frame = frame.drop_duplicates(["key", "column"], keep="last")
+        frame["present"] = True
+
+        values = frame.pivot(index="key", columns="column", values="value")
+        present = frame.pivot(index="key", columns="column", values="present").notna()
+        values.index.name = "Sample"
+        present.index.name = "Sample"
+        values.columns.name = None
+        present.columns.name = None
+        return values, present
+
+    def _output_columns(self):
+        return [f"{method}_{metric}" for method, metric in zip(self.data["method"], self.data["metric"])]
+
+    def _key_column(self):
+        return [sample if not replicate else f"{sample}_{replicate}" for sample, replicate in zip(self.data["sample"], self.data["replicate"])]
@@ -0,0 +1,87 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from ReadAndWrite.Manifest import file_hash
+
+
+class SheetCache:
+    """
+    Keeps the parsed sheets of the input files on disk, so an Excel file only has to be parsed once.
+    The entries are named after the content hash of the Excel file, thus a changed file never gets an old entry.
+    """
+
+    # Changing the format tag (or updating pandas) makes all older entries unusable, they are removed on the next eviction
+    FORMAT = f"sheet-v2-pd{pd.__version__}"
+
+    def __init__(self, cache_dir, max_size_mb=500):
+        self.cache_dir = Path(cache_dir)
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, file_path, variant="full"):
+        """
+        Builds the cache key of a file. Different ways of reading the same file are stored under different variants.
+        """
+        return f"{self.FORMAT}-{variant}-{file_hash(file_path)}"
+
+    def load(self, key):
+        """
+        Returns the cached sheet or None. A used entry is touched, so it counts as recently used for the eviction.
+        """
+        path = self.cache_dir / f"{key}.pkl"
+        if not path.exists():
+            return None
+        try:
+            df = pd.read_pickle(path)
+            os.utime(path)
+            return df
+        except Exception as e:
+            print(f"⚠️ Removing unreadable cache entry {path.name}: {e}")
+            self._remove(path)
+            return None
+
+    def store(self, key, df):
+        """
+        Saves a parsed sheet. It is written to a temporary file first, so parallel workers never read half a file.
+        """
+        path = self.cache_dir / f"{key}.pkl"
+        tmp_path = self.cache_dir / f"{key}.{os.getpid()}.tmp"
+        try:
+            df.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ Could not save {path.name} in the cache: {e}")
+            self._remove(tmp_path)
+            return
+        self._evict()
+
+    def _evict(self):
+        """
+        Removes entries of older formats and then the least recently used entries until the cache fits its size limit.
+        """
+        entries = []
+        for path in self.cache_dir.glob("*.pkl"):
+            if not path.name.startswith(f"{self.FORMAT}-"):
+                self._remove(path)
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # Removed by another worker in the meantime
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total_size <= self.max_size:
+                break
+            self._remove(path)
+            total_size -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
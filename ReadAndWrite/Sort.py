@@ -1,30 +1,49 @@
 import pandas as pd
 from pathlib import Path
+from Instrumentation import stage
+from ReadAndWrite.SortKey import natural_sort_key, sort_by_key
 
 
 class SortResult:
-    def __init__(self, file_path):
+    def __init__(self, file_path, store_path=None, sort_key=natural_sort_key):
         self.file_path = Path(file_path)
+        self.store_path = Path(store_path) if store_path is not None else None
+        self.sort_key = sort_key
 
     def sort_file(self):
         """
-        Sorts the Excel file by extracting the numeric part of sample names like 'DOE 2.3'.
+        Sorts the Excel file by the sort key of the sample names (natural order: 'DOE 2.3' < 'DOE 2.3_2' < 'DOE 2.10').
+        WriteResult already keeps the file in this order, this is only needed for files written by hand or by older versions.
+        If the results are kept in a results store, the Excel file is exported from it instead.
         """
+        if self.store_path is not None:
+            self.export_store()
+            return
+
         if not self.file_path.exists():
             print("❌ File not found for sorting.")
             return
 
-        df = pd.read_excel(self.file_path)
+        with stage("sort"):
+            df = pd.read_excel(self.file_path)
+            df = sort_by_key(df, self.sort_key)
+            df.to_excel(self.file_path, index=False)
+        print(f"✅ File sorted by Sample at {self.file_path}")
+
+    def export_store(self):
+        """
+        Writes all results of the results store to the Excel file, sorted the same way as sort_file.
+        The store keeps the sort key of every sample in an index, so the rows are read in order and not sorted again.
+        """
+        from ReadAndWrite.ResultStore import ResultStore
 
-        # Extract numeric sort key from 'Sample' assuming format like 'DOE 2.3'
-        def extract_sort_key(name):
-            try:
-                return float(name.split()[1])
-            except Exception:
-                return float('inf')  # Push malformed entries to end
+        if not self.store_path.exists():
+            print("❌ Results store not found for exporting.")
+            return
 
-        df["_sort"] = df["Sample"].apply(extract_sort_key)
-        df = df.sort_values(by="_sort")
-        df.drop(columns=["_sort"], inplace=True)
-        df.to_excel(self.file_path, index=False)
-        print(f"✅ File sorted numerically by Sample at {self.file_path}")
\ No newline at end of file
+        with stage("export"):
+            with ResultStore(self.store_path, ["Sample"], sort_key=self.sort_key) as store:
+                df = store.read_all()
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            df.to_excel(self.file_path, index=False)
+        print(f"✅ {len(df)} samples exported from {self.store_path} to {self.file_path}")
@@ -0,0 +1,43 @@
+import re
+
+"""
+Sort keys for the sample names of the output file.
+A sort key turns a name into a text that sorts like the name should be sorted, so the key can be saved next to the sample
+(see ResultStore) and compared as plain text by SQLite, pandas or Python alike. Any function name -> str can be used as sort key.
+"""
+
+NUMBER = re.compile(r"(\d+)")
+DIGITS = 12  # Numbers are padded to this many digits
+LONG_NUMBER = ":"  # Comes right after "9", so a number with more than DIGITS digits sorts after all shorter ones
+
+
+# This function gives back the natural sort key of a sample name: the numbers in the name are compared as numbers, the rest as text
+# "DOE 2.3" < "DOE 2.3_1" < "DOE 2.3_2" < "DOE 2.3_10" < "DOE 2.10" < "DOE 10.1" < "Error"
+# The replicate suffix "_n" is a number like every other, the name without suffix comes first because it is shorter
+# A number with more than DIGITS digits gets LONG_NUMBER and its number of digits in front, so it is compared by its length first
+def natural_sort_key(name):
+    parts = NUMBER.split(str(name))
+    key = []
+    for position, part in enumerate(parts):
+        if position % 2:
+            digits = part.lstrip("0")
+            key.append(digits.rjust(DIGITS, "0") if len(digits) <= DIGITS else f"{LONG_NUMBER}{len(digits):04d}{digits}")
+        else:
+            key.append(part.lower())
+    return "".join(key)
+
+
+natural_sort_key.version = 2  # The long numbers were added in version 2, the results store recomputes keys of older versions
+
+
+# This function gives back a name for a sort key function, the results store recomputes its keys when the function changes
+# A function can have a "version" attribute, which is raised when its keys change
+def sort_key_name(sort_key):
+    version = getattr(sort_key, "version", None)
+    return f"{sort_key.__module__}.{sort_key.__qualname__}" + (f" v{version}" if version is not None else "")
+
+
+# This function sorts a table by the sort key of its sample names, rows with the same key keep their order
+# The sort is stable (Timsort), so a table that is already sorted with a few sorted rows added at the end is merged in one pass
+def sort_by_key(df, sort_key=natural_sort_key, column="Sample"):
+    return df.sort_values(by=column, key=lambda names: names.map(sort_key), kind="stable")
@@ -0,0 +1,114 @@
+import openpyxl
+import pandas as pd
+
+from Extraction.Reader.PlateGeometry import PlateGeometry
+
+
+class StreamReader:
+    """
+    Reads only the parts of a Spark export that are needed for the evaluation, row by row:
+    the three "Ex" rows, the "Plate area" row, the blocks after each "<>" marker and the "544" rows.
+    As soon as everything needed for the methods in the "Ex" rows was found, the rest of the sheet is only searched for a later
+    "Plate area" row, because the last one is used (see PlateLayout). Its other rows are skipped without converting them.
+    The result is a small DataFrame with these rows in their original order, so it can be used like the full sheet.
+    The number of rows of a block is taken from its header (see PlateGeometry), unless block_rows is given.
+    blocks_needed=None reads all blocks (e.g. for kinetic runs), rows starting with one of keep_labels are kept as well.
+    block_methods are the method codes read from the blocks (see Extraction/Methods.json), the blocks are only needed if one of them is used.
+    keep_scans=True keeps the whole scans ("Wavel." and all wavelength rows) instead of only the "544" rows (see Extraction/Spectral.py).
+    """
+
+    def __init__(self, file_path, blocks_needed=4, fluorescence_rows_needed=2, block_rows=None, keep_labels=(), keep_scans=False, block_methods=("b", "r")):
+        self.file_path = file_path
+        self.block_methods = set(block_methods)
+        self.keep_scans = keep_scans
+        self.blocks_needed = blocks_needed
+        self.keep_labels = set(keep_labels)
+        self.fluorescence_rows_needed = fluorescence_rows_needed
+        self.block_rows = block_rows
+
+    def read(self):
+        workbook = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            rows = self._collect(sheet.iter_rows(values_only=True))
+        finally:
+            workbook.close()
+
+        width = max((len(row) for row in rows), default=0)
+        return pd.DataFrame([row + [None] * (width - len(row)) for row in rows], dtype=object)
+
+    def _collect(self, row_iterator):
+        kept_rows = []
+        ex_rows = []
+        plate_area_found = False
+        n_blocks = 0
+        n_fluorescence = 0
+        block_rows_left = 0
+        in_scan = False
+        complete = False
+
+        for values in row_iterator:
+            if complete:
+                if "Plate area" in values:
+                    kept_rows.append([self._convert(value) for value in values])
+                continue
+            first = self._convert(values[0]) if values else None
+            keep = block_rows_left > 0
+            if block_rows_left > 0:
+                block_rows_left -= 1
+            # A scan goes on as long as the first cell is a wavelength
+            in_scan = in_scan and isinstance(first, (int, float))
+            keep = keep or in_scan
+
+            if first == "Wavel." and self.keep_scans:
+                n_fluorescence += 1
+                in_scan = True
+                keep = True
+            elif first == "<>":
+                n_blocks += 1
+                block_rows_left = self.block_rows or PlateGeometry.from_header([self._convert(value) for value in values]).n_rows
+                keep = True
+            elif str(first) == "544" and not self.keep_scans:
+                n_fluorescence += 1
+                keep = True
+            elif first in self.keep_labels:
+                keep = True
+            is_ex_row = "Ex" in values
+            if "Plate area" in values:
+                plate_area_found = True
+                keep = True
+
+            # Only the kept rows are converted, most rows of an export are skipped without touching their cells
+            if keep or is_ex_row:
+                values = [self._convert(value) for value in values]
+                kept_rows.append(values)
+                if is_ex_row:
+                    ex_rows.append(values)
+
+            # Skip the rest once the names are known and all blocks for the used methods were read completely
+            if len(ex_rows) >= 3 and plate_area_found and block_rows_left == 0 and not in_scan and self.blocks_needed is not None:
+                methods = self._read_methods(ex_rows[1])
+                blocks_done = not self.block_methods.intersection(methods) or n_blocks >= self.blocks_needed
+                fluorescence_done = "f" not in methods or n_fluorescence >= self.fluorescence_rows_needed
+                complete = blocks_done and fluorescence_done
+
+        return kept_rows
+
+    # Reads the method codes after "Ex", the same way the Name_Reader does
+    @staticmethod
+    def _read_methods(row):
+        methods = []
+        for cell in row[row.index("Ex") + 1:]:
+            if cell is None:
+                break
+            methods.append(str(cell))
+        return methods
+
+    # Converts a cell the same way pandas does when reading an Excel file (empty text is empty, whole numbers are int)
+    @staticmethod
+    def _convert(value):
+        if value == "":
+            return None
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
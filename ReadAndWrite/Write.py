@@ -1,40 +1,78 @@
 import pandas as pd
 from pathlib import Path
+from ReadAndWrite.ResultTable import ResultTable
+from ReadAndWrite.ResultStore import ResultStore
+from ReadAndWrite.SortKey import natural_sort_key, sort_by_key
+from Instrumentation import stage
 
 
 class WriteResult:
 
-    def __init__(self, output_file_path):
+    def __init__(self, output_file_path, store_path=None, sort_key=natural_sort_key, aggregate=False, statistics=("avg", "std")):
         self.output_file_path = Path(output_file_path)
+        self.store_path = Path(store_path) if store_path is not None else None
+        self.sort_key = sort_key  # The rows of the output are kept in the order of this key (see ReadAndWrite/SortKey.py)
+        self.aggregate = aggregate  # Whether the replicates of a sample are pooled over all files (see ReadAndWrite/Aggregation.py), needs a results store
+        self.statistics = statistics  # The statistics written for the pooled replicates
         self.columns = ["Sample", "fluorescence_avg", "fluorescence_std", "blue_avg", "blue_std", "red_avg", "red_std"]
 
-    def write(self, result_dict):
+    def write(self, result_table):
         """
         Main interface for writing or updating the Excel file.
+        Takes a ResultTable, results in the older dict format are converted first.
         """
-        if not self.output_file_path.exists():
-            print(f"📄 Output file not found. Creating new file at {self.output_file_path}")
-            self._create_new_file(result_dict)
-        else:
-            print(f"📄 Output file found. Updating existing file at {self.output_file_path}")
-            self._update_existing_file(result_dict)
-
-    def _create_new_file(self, result_dict):
+        if isinstance(result_table, dict):
+            result_table = ResultTable.from_dict(result_table)
+
+        # Results of other evaluations (e.g. the rates of the Kinetic version) get their own columns after the usual ones
+        # Pooled results get the columns of the pooled statistics instead, once they are computed (see _write_store)
+        if not (self.aggregate and self.store_path is not None):
+            self.columns = self.columns + [col for col in result_table.columns() if col not in self.columns]
+
+        with stage("write"):
+            if self.store_path is not None:
+                self._write_store(result_table)
+                return
+
+            if not self.output_file_path.exists():
+                print(f"📄 Output file not found. Creating new file at {self.output_file_path}")
+                self._create_new_file(result_table)
+            else:
+                print(f"📄 Output file found. Updating existing file at {self.output_file_path}")
+                self._update_existing_file(result_table)
+
+    def _write_store(self, result_table):
+        """
+        Saves the results in the results store instead of the Excel file, only the rows of the given samples are touched.
+        The Excel file is exported from the store separately (see SortResult.export_store).
+        With aggregate the results of the files are pooled with the ones already in the store instead of overwriting them.
+        """
+        if not self.store_path.exists():
+            print(f"📄 Results store not found. Creating new store at {self.store_path}")
+        with ResultStore(self.store_path, self.columns, excel_path=self.output_file_path, sort_key=self.sort_key) as store:
+            if self.aggregate:
+                from ReadAndWrite.Aggregation import ReplicateAggregates
+                result_table = ReplicateAggregates(store.connection, self.statistics).add(result_table)
+                self.columns = self.columns + [col for col in result_table.columns() if col not in self.columns]  # e.g. "blue_files"
+                store.add_columns(self.columns)
+            already_present, newly_added = store.upsert(result_table)
+        print(f"✅ Results saved in the results store at {self.store_path}")
+        self._report_samples(already_present, newly_added)
+
+    def _create_new_file(self, result_table):
         """
         Creates a new Excel file from scratch with the given results if the file does not exist.
         """
-        data_rows = []
-        for name, values in sorted(result_dict.items(), key=lambda x: x[0]):
-            row = [name] + [values.get(col, None) for col in self.columns[1:]]
-            data_rows.append(row)
-
-        df = pd.DataFrame(data_rows, columns=self.columns)
+        values, _ = result_table.to_wide()
+        df = sort_by_key(values.reindex(columns=self.columns[1:]).reset_index(), self.sort_key)
         df.to_excel(self.output_file_path, index=False)
         print("✅ File created and data written.")
 
-    def _update_existing_file(self, result_dict):
+    def _update_existing_file(self, result_table):
         """
         Updates an existing Excel file by adding or updating rows.
+        The new results are merged into the file in one step: set values overwrite the old ones, all other cells are kept.
+        The file is kept in the order of the sort key, the new samples are added in that order and merged into the rows already there.
         """
         df = pd.read_excel(self.output_file_path)
 
@@ -46,26 +84,32 @@ class WriteResult:
         df.set_index("Sample", inplace=True)
         df = df.astype(object)
 
-
-        already_present = []
-        newly_added = []
-
-        for name, values in sorted(result_dict.items(), key=lambda x: x[0]):
-            if name in df.index:
-                already_present.append(name)
-            else:
-                newly_added.append(name)
-                df.loc[name] = [None] * (len(self.columns) - 1)
-
-            for col, val in values.items():
-                if col in self.columns:
-                    df.at[name, col] = val
-
-        df.reset_index(inplace=True)  
-        df = df.sort_values(by="Sample") # Basic alphabetical sort
+        incoming, present = result_table.to_wide()
+        known_columns = [col for col in incoming.columns if col in self.columns]
+
+        keys = sorted(result_table.keys())
+        existing = set(df.index)
+        already_present = [name for name in keys if name in existing]
+        newly_added = sorted((name for name in keys if name not in existing), key=self.sort_key)
+
+        # Add the new samples as empty rows, then take every cell that was set in the results
+        new_rows = pd.DataFrame(None, index=pd.Index(newly_added, name="Sample"), columns=df.columns, dtype=object)
+        df = pd.concat([df, new_rows]) if newly_added else df
+        df.index.name = "Sample"
+        incoming = incoming.reindex(index=df.index, columns=df.columns)
+        present = present.reindex(index=df.index, columns=df.columns, fill_value=False).astype(bool)
+        present.loc[:, ~present.columns.isin(known_columns)] = False
+        df = df.mask(present, incoming.astype(object))
+
+        df.reset_index(inplace=True)
+        df = sort_by_key(df, self.sort_key)  # Both parts are already in order, so this is a single merge
         df.to_excel(self.output_file_path, index=False)
         print("✅ Existing file updated with new data.")
 
+        self._report_samples(already_present, newly_added)
+
+    @staticmethod
+    def _report_samples(already_present, newly_added):
         # 🔔 Notify user
         if already_present:
             print(f"ℹ️ These samples already existed and were updated: {', '.join(map(str, already_present))}")
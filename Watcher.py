@@ -0,0 +1,196 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import signal
+import struct
+import time
+from pathlib import Path
+
+"""
+Keeps the script running and evaluates new files as soon as they are saved in the input folder.
+The files are only processed once they stopped changing, the run manifest makes sure no file is processed twice.
+"""
+
+# inotify event flags, see "man inotify"
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0x00000800
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class InotifyEvents:
+    """
+    Reports the names of the files that were changed in a folder, using inotify of the Linux kernel.
+    """
+
+    def __init__(self, folder):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if self.libc.inotify_add_watch(self.fd, os.fsencode(str(folder)), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {folder}")
+
+    def wait(self, timeout):
+        """
+        Waits up to timeout seconds and gives back the names of the files changed in the meantime.
+        """
+        try:
+            ready, _, _ = select.select([self.fd], [], [], timeout)
+        except InterruptedError:
+            return set()
+        if not ready:
+            return set()
+
+        names = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if name:
+                names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingEvents:
+    """
+    Reports the names of the files that were changed in a folder by comparing size and modification time.
+    Used where inotify is not available (e.g. Windows, macOS or network drives).
+    """
+
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+        snapshot = self._scan()
+        names = {name for name, state in snapshot.items() if self.snapshot.get(name) != state}
+        self.snapshot = snapshot
+        return names
+
+    def close(self):
+        pass
+
+
+class FolderWatcher:
+    """
+    Watches the input folder of a setup (see main.py) and runs it for every new or changed file.
+    The imports, the sheet cache and the results store stay ready between the files, so a new file only costs its own evaluation.
+    """
+
+    def __init__(self, app, settle_seconds=2.0, poll_interval=1.0):
+        self.app = app
+        self.app.incremental = True  # The run manifest is what prevents processing a file twice
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.pending = {}  # file name -> (size, mtime, time of the last change)
+        self._stop = False
+
+    def run(self):
+        self._install_signal_handlers()
+        events = self._open_events()
+
+        # Files that were saved while the script was not running
+        print(f"👀 Watching {self.app.input_folder} for new files (stop with Ctrl+C)")
+        self._process(None)
+
+        try:
+            while not self._stop:
+                timeout = self.poll_interval if not self.pending else min(self.poll_interval, self.settle_seconds / 2)
+                for name in events.wait(timeout):
+                    if self._is_input_file(name):
+                        self._mark_changed(name)
+                ready = self._settled_files()
+                if ready and not self._stop:
+                    self._process(ready)
+        finally:
+            events.close()
+            print("👋 Stopped watching the input folder.")
+
+    def stop(self, *args):
+        self._stop = True
+
+    def _install_signal_handlers(self):
+        signal.signal(signal.SIGINT, self.stop)
+        if hasattr(signal, "SIGTERM"):
+            signal.signal(signal.SIGTERM, self.stop)
+
+    def _open_events(self):
+        try:
+            events = InotifyEvents(self.app.input_folder)
+            print("ℹ️ Using inotify to watch the input folder.")
+            return events
+        except (OSError, AttributeError) as e:
+            print(f"ℹ️ inotify not available ({e}), checking the input folder every {self.poll_interval} s instead.")
+            return PollingEvents(self.app.input_folder)
+
+    # Excel keeps lock files like "~$name.xlsx" next to open files, these are never evaluated
+    @staticmethod
+    def _is_input_file(name):
+        return name.endswith(".xlsx") and not name.startswith("~$")
+
+    def _mark_changed(self, name):
+        state = self._stat(name)
+        if state is not None:
+            self.pending[name] = (*state, time.monotonic())
+
+    # A file counts as finished once its size and modification time did not change for settle_seconds
+    def _settled_files(self):
+        now = time.monotonic()
+        ready = []
+        for name, (size, mtime, changed_at) in list(self.pending.items()):
+            state = self._stat(name)
+            if state is None:
+                del self.pending[name]  # Removed or renamed again
+            elif state != (size, mtime):
+                self.pending[name] = (*state, now)
+            elif now - changed_at >= self.settle_seconds:
+                del self.pending[name]
+                ready.append(name)
+        return sorted(ready)
+
+    def _stat(self, name):
+        try:
+            stat = os.stat(os.path.join(self.app.input_folder, name))
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    # Runs the setup on the given files (or the whole folder), a failing file does not stop the watcher
+    def _process(self, files):
+        start = time.perf_counter()
+        try:
+            processed = self.app.run(files)
+        except SystemExit:
+            print("❌ The evaluation stopped, waiting for the next file.")
+            return
+        if files and processed:
+            print(f"⏱️ {', '.join(processed)} evaluated in {time.perf_counter() - start:.2f} s")
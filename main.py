@@ -1,9 +1,15 @@
+import argparse
 import os
 import sys
+import time
 from pathlib import Path
-from ReadAndWrite.Write import WriteResult
-from ReadAndWrite.Sort import SortResult
-from Coordinator import Coordinator
+from ReadAndWrite.Manifest import RunManifest
+from ReadAndWrite.Quarantine import Quarantine
+from ReadAndWrite.SortKey import natural_sort_key
+from Extraction.Registry import MethodRegistry
+from Instrumentation import instrumentation, stage
+# pandas, openpyxl and the extractors are only imported once a file is evaluated or written (see Benchmark/Import_Budget.py),
+# so "--help", "--validate" and runs without new files start quickly
 
 """
 -------------------This is the main script--------------------
@@ -13,6 +19,14 @@ and save the results into a single output file.
 In the following part the script will cycle through all the files in the reading-folder, 
 will give the file to the Coordinator (another script) to evaluate the data,
 and then saves the data given by the Coordinator in the output file.
+
+The settings below are the defaults, the most important ones can also be given on the command line:
+    python main.py --input "path/to/folder" --output "path/to/Data collection.xlsx" --version LS --no-individual --workers 4
+    python main.py --dry-run     (shows which files would be evaluated)
+    python main.py --validate    (checks the settings and folders)
+    python main.py --check-files (checks the layout of every input file without evaluating it)
+    python main.py --remove-file "DOE 12.7.xlsx"   (takes a deleted file out of the pooled results, see aggregate_replicates)
+    python main.py --help
 """
 
 current_dir = Path(__file__).parent
@@ -24,6 +38,17 @@ input_folder = current_dir / "Evaluation Folder" / "Input"
 # Collected data will be saved in this folder
 output_file = current_dir / "Evaluation Folder" / "Output" / "Data collection.xlsx"
 #output_file = r'C:\Users\m4ng0\OneDrive\Desktop\Morph\Data collection.xlsx'  # Path to save the output file
+# The results are kept in this database and the output file above is exported from it (set to None to write the output file directly like in the older versions)
+# Only the rows of the new samples are changed in the database, so adding a few results to a large collection stays fast.
+# If the database does not exist yet, the results already in the output file are taken over.
+results_store = current_dir / "Evaluation Folder" / "Output" / "Data collection.sqlite"
+# Whether to export the output file from the database at the end of every run. If set to False, the database is only updated.
+export_excel = True
+# The parsed Excel files are kept in this folder, so a file does not have to be parsed again in the next run (set to None to turn it off)
+cache_folder = current_dir / "Evaluation Folder" / "Cache"
+# Files that cannot be evaluated (e.g. a typo in the "Ex" rows) are moved to this folder and the run goes on with the other files.
+# The reasons are written to "Error report.json" in this folder. Set to None to stop the whole run at the first failing file like in the older versions.
+quarantine_folder = current_dir / "Evaluation Folder" / "Quarantine"
 
 
 
@@ -37,73 +62,497 @@ Furthermore, the script can evaluate the data further based on the Version selec
 Known Versions:
 LS: LS's Rheomorph project
 Raw: Raw data. Takes the average and standard deviation of the samples, considers the dilution, but no further evaluation, same writing style as LS
+Kinetic: Kinetic runs, every "<>" block is one cycle. Writes the rate (change per second) and/or the area under the curve of every sample
+         in the columns "blue_rate_avg", "blue_auc_avg", ... (see kinetic_metrics below). A measurement is blue or red by its name ("Name" row).
+New Versions and methods are registered in "Extraction/Methods.json".
 """
 
 
+# Which wavelength of the emission scans ("Wavel." tables) is used, per method: (how, wavelength)
+# "fixed": exactly this wavelength, "nearest": the wavelength of the scan closest to it, "peak": the highest value of every sample (the wavelength is ignored)
+# ("fixed", 544) reads only the "544" rows like the older versions. The absorbance is read from the "<>" blocks, which have only one wavelength,
+# so only "f" can be chosen here. The files already processed are evaluated again after changing this (see "incremental").
+wavelength_selection = {"f": ("fixed", 544)}
+
 # Whether to return individual replicate values in the output file or just the average and standard deviation.
 return_individual=True
 
+# Which statistics of the replicates are written to the output file when return_individual is False, each in its own column ("blue_avg", "blue_n", ...).
+# avg: average, std: standard deviation (ddof=1, 0 for one replicate), n: number of replicates, cv: std / avg (empty if avg is 0), sem: std / sqrt(n)
+statistics = ["avg", "std"]
+
+# Which metrics of every well are written for the Version "Kinetic": "rate" (slope over time, "blue_rate_avg", ...) and "auc" (area under the curve, "blue_auc_avg", ...)
+kinetic_metrics = ["rate", "auc"]
+
+# Whether the replicates of a sample measured in several files (e.g. "DOE 12.7.xlsx" and "DOE 11.7 12.7.xlsx") are pooled instead of
+# the latest file overwriting the earlier one. The statistics above are then computed over the replicates of all files, "blue_files", ... tell from how many files.
+# Needs the results store and return_individual = False. A changed file replaces its old replicates, a deleted file is taken out with
+# "python main.py --remove-file NAME". All files are evaluated again after turning this on or off (see "incremental"), so all files are pooled from the start.
+aggregate_replicates = False
+
+# Whether to collect the results of many files first and write them to the output file together (in chunks of commit_chunk_size files),
+# If set to False, the output file is written after every single input file, like in the older versions.
+batch_commit = True
+
+# The rows of the output file are kept in the order of this key, new samples are merged in at their place, so the file is never sorted again.
+# natural_sort_key compares the numbers in the names as numbers: "DOE 2.3" < "DOE 2.3_1" < "DOE 2.3_2" < "DOE 2.3_10" < "DOE 2.10".
+# Any function that turns a sample name into a text can be used (see ReadAndWrite/SortKey.py), the results store sorts itself again when it changes.
+sort_key = natural_sort_key
+
+# In batch mode the results are written to the output after every this many files and then released,
+# so the memory needed stays the same for 50 or 50 000 input files. A larger number means fewer writes of the output file.
+commit_chunk_size = 500
+
+# Whether to skip input files that were already processed in an earlier run with the same settings (Version, return_individual, statistics, ...).
+# A file processed with other settings is evaluated again.
+# Which files were processed is saved in the file "Data collection manifest.json" next to the output file.
+# Delete that file (or the output file) to process all files again.
+incremental = True
+
+# Number of files that are processed at the same time, each in its own process.
+# 1 processes the files one after another. The results are always merged in the order of the file names,
+# so the output file is the same no matter how many workers are used.
+workers = 1
+
+# Whether to read only the rows of the Excel files that are needed for the evaluation ("Ex" rows, "Plate area", the "<>" blocks and the "544" rows or the whole scans).
+# Reading stops as soon as everything was found, which is faster and needs less memory for large exports.
+# Set to False to read the whole sheet like in the older versions.
+streaming_reader = True
+
+# Whether to keep the script running and evaluate new files as soon as they are saved in the input folder.
+# A file is evaluated once it did not change for "watch_settle_seconds". Stop the script with Ctrl+C.
+# The files are always processed incrementally in this mode, so no file is evaluated twice.
+watch = False
+watch_settle_seconds = 2.0
+
+# Whether to measure the time and memory needed for every step and file (reading, names, fluorescence, absorption, writing, export).
+# The measurements are saved in "Data collection run report.json" next to the output file and summarised at the end of the run.
+# Measuring the memory makes the run slower, set run_report_memory to False to only measure the times.
+run_report = False
+run_report_memory = True
+# Name of one input file (e.g. "DOE 1.5 2.5.xlsx") that is evaluated with cProfile, to find the slowest functions. None turns it off.
+profile_file = None
+
 
 
 
 class setup:
     # This is needed to start the script and initialises the lists in which all the data is collected
-    def __init__(self, input_folder, output_file, Version, return_individual):
+    def __init__(self, input_folder, output_file, Version, return_individual, batch_commit=True, incremental=True, workers=1, cache_folder=None, streaming_reader=False, results_store=None, export_excel=True, wavelength_selection=None, statistics=("avg", "std"), quarantine_folder=None, commit_chunk_size=500, sort_key=natural_sort_key, aggregate_replicates=False, kinetic_metrics=("rate", "auc")):
         self.input_folder = input_folder
         self.output_path = output_file
         self.Version = Version
         self.all_results = []
         self.return_individual = return_individual
+        self.batch_commit = batch_commit
+        self.commit_chunk_size = max(1, int(commit_chunk_size))
+        self.sort_key = sort_key
+        self.incremental = incremental
+        self.workers = max(1, int(workers))
+        self.cache_folder = cache_folder
+        self.streaming_reader = streaming_reader
+        self.results_store = results_store
+        self.export_excel = export_excel
+        self.wavelength_selection = dict(wavelength_selection or {})
+        for method in self.wavelength_selection:
+            if method != "f":
+                print(f"⚠️ A wavelength selection for '{method}' is ignored, only the fluorescence ('f') is measured as a scan.")
+        from Extraction.Transformation.avg_std import STATISTICS
+        self.statistics = list(statistics)
+        unknown = [statistic for statistic in self.statistics if statistic not in STATISTICS]
+        if unknown:
+            print(f"❌ Unknown statistics: {', '.join(unknown)}. Please use {', '.join(STATISTICS)}. This can be set in the main.py file.")
+            sys.exit()
+        self.kinetic_metrics = list(kinetic_metrics)
+        if Version == "Kinetic":
+            from Extraction.Kinetic import KineticSeries
+            unknown = [metric for metric in self.kinetic_metrics if metric not in KineticSeries.METRICS]
+            if unknown or not self.kinetic_metrics:
+                print(f"❌ Unknown or no kinetic_metrics: {', '.join(unknown)}. Please use {', '.join(KineticSeries.METRICS)}. This can be set in the main.py file.")
+                sys.exit()
+        registry = MethodRegistry.load()
+        if registry.version(Version) is None:
+            known = "', '".join(registry.versions)
+            print(f"❌ Unknown Version: {Version}. Please use '{known}'. This can be set in the main.py file.")
+            sys.exit()
+        self.aggregate_replicates = aggregate_replicates
+        if aggregate_replicates and (return_individual or results_store is None):
+            print("⚠️ aggregate_replicates needs the results store and return_individual = False, the replicates are not pooled.")
+            self.aggregate_replicates = False
+        self.quarantine = Quarantine(quarantine_folder) if quarantine_folder is not None else None
+        self.failed_files = []
+        self.manifest = None
+        self.duplicates = []
+        # The measurements of the steps are collected in the instrumentation of this process (see Instrumentation.py)
+        self.report_path = Path(output_file).with_name(f"{Path(output_file).stem} run report.json")
     
-    # This function will try to run the Coordinator on all files in the input folder
-    def run(self):
-        files = self._find_files()
+    # This function will try to run the Coordinator on all files in the input folder, or only on the given files
+    # Gives back the files that were evaluated
+    def run(self, files=None):
+        instrumentation.take_records()  # Every run gets its own report
+        with stage("run"):
+            processed = self._run(files)
+        instrumentation.write_report(self.report_path)
+        return processed
+
+    # The statistics every file gives back: for pooling the replicates of several files the number, average and standard deviation are always needed
+    def _file_statistics(self):
+        if not self.aggregate_replicates:
+            return self.statistics
+        from ReadAndWrite.Aggregation import ReplicateAggregates
+        return list(ReplicateAggregates.MOMENTS) + [statistic for statistic in self.statistics if statistic not in ReplicateAggregates.MOMENTS]
+
+    # This function takes the replicates of files that were deleted from the input folder out of the pooled results (see aggregate_replicates)
+    # The files are forgotten by the run manifest, so they are evaluated again if they are put back
+    def remove_files(self, file_names):
+        if not self.aggregate_replicates:
+            print("❌ Files can only be removed from pooled results, please set aggregate_replicates = True (and use the results store).")
+            return False
+        from ReadAndWrite.Aggregation import ReplicateAggregates
+        from ReadAndWrite.ResultStore import ResultStore
+        from ReadAndWrite.Write import WriteResult
+
+        writer = WriteResult(self.output_path, store_path=self.results_store, sort_key=self.sort_key)
+        with ResultStore(self.results_store, writer.columns, sort_key=self.sort_key) as store:
+            pooled = ReplicateAggregates(store.connection, self.statistics).remove_sources(file_names)
+            store.add_columns(pooled.columns())
+            store.upsert(pooled)
+        print(f"✅ {', '.join(file_names)} taken out of {len(pooled.keys())} sample(s) in the results store")
+
+        manifest = RunManifest(self.results_store)
+        for file_name in file_names:
+            manifest.forget(file_name)
+        manifest.save()
+        self._export_output()
+        return True
+
+    # This function shows which files a run would evaluate, without evaluating or writing anything
+    def dry_run(self, files=None):
+        files = self._find_files() if files is None else list(files)
+        if self.incremental:
+            self.manifest = RunManifest(self.results_store if self.results_store is not None else self.output_path)
+            files = self._select_files(files)
+        print(f"📝 Dry run: {len(files)} file(s) would be evaluated with Version {self.Version}, nothing is written.")
+        for file_name in files:
+            print(f"   - {file_name}")
+        return files
+
+    # This function checks the settings and folders before a run, without opening any Excel file
+    # Gives back True if everything is fine
+    def validate(self):
+        problems = []
+        if not os.path.isdir(self.input_folder):
+            problems.append(f"The input folder does not exist: {self.input_folder}")
+        elif not self._find_files():
+            problems.append(f"The input folder contains no .xlsx files: {self.input_folder}")
+        if not Path(self.output_path).parent.is_dir():
+            problems.append(f"The folder of the output file does not exist: {Path(self.output_path).parent}")
+        elif not os.access(Path(self.output_path).parent, os.W_OK):
+            problems.append(f"The folder of the output file is not writable: {Path(self.output_path).parent}")
+
+        for problem in problems:
+            print(f"❌ {problem}")
+        if not problems:
+            print(f"✅ Settings are valid: {len(self._find_files())} input file(s), Version {self.Version}, return_individual={self.return_individual}, {self.workers} worker(s).")
+        return not problems
+
+    # This function checks the layout of the input files ("Ex" rows, plate area, blanks, blocks) without evaluating them
+    # The files are checked in parallel, the report is saved next to the output file. Gives back the report.
+    def check_files(self, files=None):
+        from ReadAndWrite.HeaderCheck import check_folder, write_report
+        files = self._find_files() if files is None else list(files)
+        workers = self.workers if self.workers > 1 else (os.cpu_count() or 1)  # The check only reads, so all cores are used unless workers is set
+        report = check_folder(self.input_folder, files, self.Version, self.wavelength_selection, workers)
+        report_path = Path(self.output_path).with_name(f"{Path(self.output_path).stem} layout report.json")
+        write_report(report, report_path)
+
+        for entry in report["files"]:
+            for error in entry["errors"]:
+                print(f"❌ {entry['file']}: {error}")
+            for warning in entry["warnings"]:
+                print(f"⚠️ {entry['file']}: {warning}")
+        summary = report["summary"]
+        print(f"📝 {summary['files']} file(s) checked in {summary['seconds']:.2f} s: {summary['ok']} ok, {summary['warning']} with warnings, {summary['error']} with errors.")
+        print(f"   The report is saved in {report_path}")
+        return report
+
+    def _run(self, files):
+        files = self._find_files() if files is None else list(files)
+        if self.incremental:
+            # The manifest belongs to the file the results are kept in
+            self.manifest = RunManifest(self.results_store if self.results_store is not None else self.output_path)
+            files = self._select_files(files)
+            if not files:
+                if not self.manifest.entries:
+                    print(f"ℹ️ No input files to process yet in {self.input_folder}")
+                    return []
+                print("✅ Nothing new to process, the output file is up to date.")
+                self._record_files([])  # Still remember skipped duplicates and touched files
+                if not Path(self.output_path).exists():
+                    self._export_output()
+                return []
+
+        from ReadAndWrite.ResultTable import ResultTable
+
+        # The files go through a pipeline: read and extract one after another (_extract_files), collect the results in chunks (_chunks)
+        # and write each chunk to the output (_commit_output). Only one chunk of results is kept in memory, so the memory does not grow with the folder.
+        # In batch mode a chunk holds commit_chunk_size files, otherwise every file is written on its own like in the older versions
+        self.failed_files = []
+        seen_samples = set()
+        written = False
+        chunk_size = self.commit_chunk_size if self.batch_commit else 1
+        for chunk in self._chunks(self._extract_files(files), chunk_size):
+            if self.batch_commit:
+                for file_name, file_results in chunk:
+                    self._report_overwritten(seen_samples, file_results, file_name, self.aggregate_replicates)
+            self.all_results = ResultTable.concat([file_results for _, file_results in chunk])
+            if len(self.all_results) or not self.batch_commit:
+                if self.batch_commit:
+                    print(f"\n💾 Writing the results of {len(chunk)} file(s) to the output file")
+                self._commit_output()
+                written = True
+            self._record_files([(file_name, file_results.keys()) for file_name, file_results in chunk])
+            self.all_results = None
+        if not written:
+            self._record_files([])  # Still remember skipped duplicates
+        self._export_output()
+        # The failing files are only moved once the results of all other files are saved
+        if self.quarantine is not None:
+            self.quarantine.commit()
+        return [file_name for file_name in files if file_name not in self.failed_files]
+
+    # This function selects the files that are new or changed since the last run, based on the run manifest
+    # Files with exactly the same content as an already processed file are skipped as well
+    def _select_files(self, files):
+        selected = []
+        seen_hashes = {}
+        unchanged = 0
+        for file_name in files:
+            full_path = os.path.join(self.input_folder, file_name)
+            if not self.manifest.needs_processing(file_name, full_path, self._manifest_settings()):
+                unchanged += 1
+                continue
+
+            duplicate = self.manifest.find_processed_duplicate(file_name, full_path, self._manifest_settings())
+            if duplicate is None:
+                duplicate = seen_hashes.get(self.manifest.file_hash(full_path))
+            if duplicate is not None:
+                print(f"⚠️ {file_name} has exactly the same content as {duplicate} and is skipped.")
+                self.duplicates.append((file_name, duplicate))
+                continue
+
+            seen_hashes[self.manifest.file_hash(full_path)] = file_name
+            selected.append(file_name)
+
+        print(f"🔎 {len(selected)} new or changed file(s) found, {unchanged} unchanged file(s) skipped.")
+        return selected
+
+    # The settings that change the results of a file, a file processed with other settings is processed again (see RunManifest)
+    def _manifest_settings(self):
+        return {"Version": self.Version, "return_individual": self.return_individual, "statistics": self.statistics,
+                "kinetic_metrics": self.kinetic_metrics, "wavelength_selection": self.wavelength_selection,
+                "aggregate_replicates": self.aggregate_replicates}
+
+    # This function saves in the run manifest which files are now included in the output file
+    def _record_files(self, processed_files):
+        if self.manifest is None:
+            return
+        samples_by_file = {}
+        for file_name, sample_keys in processed_files:
+            samples_by_file[file_name] = sample_keys
+            full_path = os.path.join(self.input_folder, file_name)
+            self.manifest.record(file_name, full_path, self._manifest_settings(), sample_keys)
+
+        # A skipped duplicate is only recorded once the file it duplicates is saved in the output file
+        remaining = []
+        for file_name, duplicate in self.duplicates:
+            if duplicate in samples_by_file or duplicate in self.manifest.entries:
+                full_path = os.path.join(self.input_folder, file_name)
+                sample_keys = samples_by_file.get(duplicate, self.manifest.entries[duplicate]["samples"])
+                self.manifest.record(file_name, full_path, self._manifest_settings(), sample_keys, duplicate_of=duplicate)
+            else:
+                remaining.append((file_name, duplicate))
+        self.duplicates = remaining
+
+        try:
+            self.manifest.save()
+        except Exception as e:
+            print(f"⚠️ Failed to save the run manifest, all files will be processed again next time: {e}")
+
+    # This function runs the Coordinator on the files and gives back the results file by file, in the order of the files
+    def _extract_files(self, files):
+        if self.workers > 1 and len(files) > 1:
+            yield from self._extract_files_parallel(files)
+            return
+
+        from Coordinator import Coordinator
+
         for file_name in files:
             full_path = os.path.join(self.input_folder, file_name)
             print(f"\n📂 Processing: {file_name}")
             try:
-                processor = Coordinator(full_path, self.Version, return_individual=self.return_individual)
-                self.all_results = processor.get_result()
+                processor = Coordinator(full_path, self.Version, return_individual=self.return_individual, cache_dir=self.cache_folder, streaming=self.streaming_reader, wavelength_selection=self.wavelength_selection, statistics=self._file_statistics(), kinetic_metrics=self.kinetic_metrics)
+                result = processor.get_result()
                 #print(f"✅ Processed {file_name} successfully: {self.all_results} samples extracted.")
             except Exception as e:
-                print(f"❌ Failed to process {file_name}: {e}")
-                sys.exit()
-            
+                self._handle_failure(file_name, e)
+                continue
+            yield file_name, result
 
-            # Collect results
-            try:
-                self._write_output()  # Write the results to the output file
-            except Exception as e:
-                print(f"❌ Failed to write output: {e}")
-                sys.exit()
-            
-            # Sort the output file
-            try:
-                self._sort_output()  # Sort the output file 
-            except Exception as e:
-                print(f"❌ Failed to sort output: {e}")
-                sys.exit()
+    # This function processes several files at the same time in separate processes
+    # The results are still given back in the order of the files, so the output is the same as processing them one by one
+    # At most two files per worker are started ahead, so finished results do not pile up while the output is written
+    def _extract_files_parallel(self, files):
+        from collections import deque
+        from concurrent.futures import ProcessPoolExecutor
+        from Coordinator import extract_file
+
+        print(f"\n⚙️ Processing {len(files)} file(s) with {self.workers} workers")
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            waiting = iter(files)
+            pending = deque()
+
+            def submit_next():
+                file_name = next(waiting, None)
+                if file_name is not None:
+                    full_path = os.path.join(self.input_folder, file_name)
+                    pending.append((file_name, executor.submit(extract_file, full_path, self.Version, self.return_individual, self.cache_folder, self.streaming_reader,
+                                                               instrumentation.settings(), self.wavelength_selection, self._file_statistics(), self.kinetic_metrics)))
+
+            for _ in range(2 * self.workers):
+                submit_next()
+            while pending:
+                file_name, future = pending.popleft()
+                submit_next()
+                try:
+                    result, records = future.result()
+                    instrumentation.add_records(records)
+                except Exception as e:
+                    if self.quarantine is not None:
+                        self._handle_failure(file_name, e)
+                        continue
+                    # Wait for the files already started, so every failing file is reported with its name before stopping
+                    print(f"❌ Failed to process {file_name}: {e}")
+                    for other_name, other_future in pending:
+                        try:
+                            other_future.result()
+                        except Exception as other_e:
+                            print(f"❌ Failed to process {other_name}: {other_e}")
+                    sys.exit()
+                print(f"\n📂 Processed: {file_name}")
+                yield file_name, result
+
+    # This function puts a failing file into the quarantine, so the run goes on with the next file
+    # Without a quarantine folder the whole run stops like in the older versions
+    def _handle_failure(self, file_name, error):
+        if self.quarantine is None:
+            print(f"❌ Failed to process {file_name}: {error}")
+            sys.exit()
+        self.failed_files.append(file_name)
+        self.quarantine.record(file_name, os.path.join(self.input_folder, file_name), error)
+
+    # This function writes the results in all_results to the output file, the new samples are merged in at their place in the order of sort_key
+    def _commit_output(self):
+        try:
+            self._write_output()  # Write the results to the output file
+        except Exception as e:
+            print(f"❌ Failed to write output: {e}")
+            sys.exit()
 
-        
-    # This function finds all the files in the input folder that end with .xlsx
+    # This function groups the results of the files into chunks of size files, a chunk is given back as soon as it is full
+    @staticmethod
+    def _chunks(file_results, size):
+        chunk = []
+        for item in file_results:
+            chunk.append(item)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    # This function exports the output file from the results store, timed separately from the evaluation
+    # Nothing is exported before the first results were saved in the results store (e.g. the watcher started on an empty folder)
+    def _export_output(self):
+        if self.results_store is None or not self.export_excel or not Path(self.results_store).exists():
+            return
+        from ReadAndWrite.Sort import SortResult
+        start = time.perf_counter()
+        try:
+            SortResult(self.output_path, store_path=self.results_store, sort_key=self.sort_key).export_store()
+        except Exception as e:
+            print(f"❌ Failed to export the output file: {e}")
+            sys.exit()
+        print(f"⏱️ Export of the output file took {time.perf_counter() - start:.2f} s")
+
+    # This function reports which samples of a file were already measured in an earlier file of the run
+    # All results are merged in the order of the files, so a later file overwrites the values of the earlier one, the same way the output file is updated
+    @staticmethod
+    def _report_overwritten(seen_samples, file_results, file_name, pooled=False):
+        file_samples = file_results.keys()
+        overwritten = sorted(name for name in file_samples if name in seen_samples)
+        seen_samples.update(file_samples)
+        if overwritten and pooled:
+            print(f"ℹ️ These samples were already measured in an earlier file of this run and are pooled with the replicates of {file_name}: {', '.join(map(str, overwritten))}")
+        elif overwritten:
+            print(f"ℹ️ These samples were already measured in an earlier file of this run and are overwritten by {file_name}: {', '.join(map(str, overwritten))}")
+
+    # This function finds all the files in the input folder that end with .xlsx, sorted by name so every run uses the same order
     def _find_files(self):
-        return [f for f in os.listdir(self.input_folder) if f.endswith(".xlsx")]
+        return sorted(f for f in os.listdir(self.input_folder) if f.endswith(".xlsx"))
 
 
     # This function saves the data collected in the all_results and all_metadata lists to the output file
     def _write_output(self):
-        writer = WriteResult(self.output_path)
+        from ReadAndWrite.Write import WriteResult
+        writer = WriteResult(self.output_path, store_path=self.results_store, sort_key=self.sort_key, aggregate=self.aggregate_replicates, statistics=self.statistics)
         writer.write(self.all_results)  # Write the results to the output file
-    
-    # This function sorts the output file after writing it
-    def _sort_output(self):
-        sorter = SortResult(self.output_path)
-        sorter.sort_file()
 
     
 
+# This function reads the command line, every option that is not given keeps the value set at the top of this file
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluates the Spark exports in the input folder and collects the results in one output file. "
+                                                 "Options that are not given are taken from the settings at the top of main.py.")
+    parser.add_argument("--input", type=Path, default=input_folder, help=f"folder with the Excel files (default: {input_folder})")
+    parser.add_argument("--output", type=Path, default=None, help=f"output file, the results store is kept next to it (default: {output_file})")
+    parser.add_argument("--version", dest="Version", default=Version, help=f"Version of the evaluation, e.g. LS, Raw or Kinetic (default: {Version})")
+    parser.add_argument("--individual", action=argparse.BooleanOptionalAction, default=return_individual,
+                        help=f"write every replicate instead of average and standard deviation (default: {return_individual})")
+    parser.add_argument("--workers", type=int, default=workers, help=f"number of files processed at the same time (default: {workers})")
+    parser.add_argument("--dry-run", action="store_true", help="only show which files would be evaluated, nothing is written")
+    parser.add_argument("--validate", action="store_true", help="only check the settings and folders, no file is evaluated")
+    parser.add_argument("--remove-file", action="append", default=[], metavar="NAME",
+                        help="take the replicates of a deleted input file out of the pooled results (aggregate_replicates), can be given several times")
+    parser.add_argument("--check-files", action="store_true", help="only check the layout of every input file and save a JSON report, no file is evaluated")
+    arguments = parser.parse_args(argv)
+
+    # With another output file, the results store moves with it
+    arguments.results_store = results_store
+    if arguments.output is None:
+        arguments.output = output_file
+    elif results_store is not None:
+        arguments.results_store = arguments.output.with_suffix(".sqlite")
+    return arguments
+
+
 # This is the main entry point of the script
 if __name__ == "__main__":
-    app = setup(input_folder, output_file, Version, return_individual) # Calling the setup class (the part above)
-    app.run() # Running the setup class
+    arguments = parse_arguments()
+    instrumentation.configure(enabled=run_report, memory=run_report_memory, profile_file=profile_file, profile_folder=Path(arguments.output).parent)
+    app = setup(arguments.input, arguments.output, arguments.Version, arguments.individual, batch_commit, incremental, arguments.workers, cache_folder,
+                streaming_reader, arguments.results_store, export_excel, wavelength_selection, statistics, quarantine_folder, commit_chunk_size, sort_key, aggregate_replicates, kinetic_metrics) # Calling the setup class (the part above)
+    if arguments.validate:
+        sys.exit(0 if app.validate() else 1)
+    elif arguments.check_files:
+        sys.exit(0 if app.check_files()["summary"]["error"] == 0 else 1)
+    elif arguments.remove_file:
+        sys.exit(0 if app.remove_files(arguments.remove_file) else 1)
+    elif arguments.dry_run:
+        app.dry_run()
+    elif watch:
+        from Watcher import FolderWatcher
+        FolderWatcher(app, settle_seconds=watch_settle_seconds).run() # Keep running and evaluate new files when they arrive
+    else:
+        app.run() # Running the setup class
 
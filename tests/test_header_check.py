@@ -0,0 +1,38 @@
+import sys
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # The modules are in the folder above
+
+from Benchmark.Generator import WorkbookGenerator
+from Extraction.Reader.PlateLayout import PlateLayout
+from ReadAndWrite.HeaderCheck import HeaderCheck
+
+
+# Writes an export with a second "Plate area" row at the end of the sheet, one of the two rows holds the wrong positions
+def write_two_plate_areas(file_path, wrong_first):
+    WorkbookGenerator().write(file_path)
+    workbook = openpyxl.load_workbook(file_path)
+    sheet = workbook.worksheets[0]
+    first = next(row for row in sheet.iter_rows() if row[0].value == "Plate area")
+    plate_area = first[4].value
+    if wrong_first:
+        first[4].value = "A1"
+    sheet.append([])
+    sheet.append(["Plate area", None, None, None, plate_area if wrong_first else "A1"])
+    workbook.save(file_path)
+
+
+def test_check_uses_the_last_plate_area_like_the_evaluation(tmp_path):
+    for wrong_first in (True, False):
+        file_path = tmp_path / f"two plate areas {wrong_first}.xlsx"
+        write_two_plate_areas(file_path, wrong_first)
+
+        layout = PlateLayout(pd.read_excel(file_path, header=None), str(file_path)).build()
+        report = HeaderCheck(file_path, "LS").check()
+
+        positions_fit = len(layout.positions) == len(layout.samples)
+        assert positions_fit == wrong_first
+        assert (report["status"] != "error") == positions_fit, report["errors"]
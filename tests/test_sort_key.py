@@ -0,0 +1,16 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # The modules are in the folder above
+
+from ReadAndWrite.SortKey import natural_sort_key
+
+
+def test_numbers_sort_as_numbers():
+    names = ["DOE 2.10", "DOE 2.3_10", "Error", "DOE 2.3", "DOE 10.1", "DOE 2.3_2", "DOE 2.3_1"]
+    assert sorted(names, key=natural_sort_key) == ["DOE 2.3", "DOE 2.3_1", "DOE 2.3_2", "DOE 2.3_10", "DOE 2.10", "DOE 10.1", "Error"]
+
+
+def test_long_numbers_sort_after_shorter_ones():
+    names = ["S 99999999999999", "S 1234567890123", "S 999999999999", "S 1234567890124", "S 7"]
+    assert sorted(names, key=natural_sort_key) == ["S 7", "S 999999999999", "S 1234567890123", "S 1234567890124", "S 99999999999999"]
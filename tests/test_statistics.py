@@ -0,0 +1,19 @@
+import math
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # The modules are in the folder above
+
+from Extraction.Transformation.avg_std import statistics_from_moments, summarize_groups
+
+
+def test_cv_of_a_zero_average_is_empty():
+    summary = summarize_groups({"cancel": [1.0, -1.0], "sample": [2.0, 4.0]}, ["cancel", "sample"], ["avg", "cv"])
+    assert summary["avg"] == [0.0, 3.0]
+    assert summary["cv"][0] is None
+    assert math.isclose(summary["cv"][1], math.sqrt(2) / 3)
+
+
+def test_cv_from_moments_matches_summarize_groups():
+    assert math.isnan(statistics_from_moments(2, 0.0, 2.0)["cv"])
+    assert math.isclose(statistics_from_moments(2, 3.0, 2.0)["cv"], math.sqrt(2) / 3)
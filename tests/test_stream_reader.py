@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # The modules are in the folder above
+
+from Benchmark.Generator import WorkbookGenerator
+from Extraction.Reader.PlateLayout import PlateLayout
+from ReadAndWrite.Stream_Reader import StreamReader
+
+
+# Writes an export with the "Ex" rows at the top and a second "Plate area" row at the end of the sheet,
+# the first "Plate area" row is wrong, so only the last one gives the right positions
+def write_two_plate_areas(file_path):
+    WorkbookGenerator(ex_rows_at_top=True).write(file_path)
+    workbook = openpyxl.load_workbook(file_path)
+    sheet = workbook.worksheets[0]
+    first = next(row for row in sheet.iter_rows() if row[0].value == "Plate area")
+    plate_area = first[4].value
+    first[4].value = "A1"
+    sheet.append([])
+    sheet.append(["Plate area", None, None, None, plate_area])
+    workbook.save(file_path)
+
+
+def test_stream_reader_uses_the_last_plate_area(tmp_path):
+    file_path = tmp_path / "two plate areas.xlsx"
+    write_two_plate_areas(file_path)
+
+    full = PlateLayout(pd.read_excel(file_path, header=None), str(file_path)).build()
+    streamed = PlateLayout(StreamReader(file_path).read(), str(file_path)).build()
+
+    assert len(full.positions) == len(full.samples)
+    assert streamed.positions == full.positions
+    assert streamed.samples == full.samples